@@ -0,0 +1,243 @@
+"""
+Geração de Propostas em Lote (linha de comando)
+Lê registros PropostaRequest de um arquivo JSONL ou CSV e gera os PDFs num
+pool de processos, sem passar pela API HTTP
+
+Uso:
+    python -m app.cli entrada.jsonl --saida /dados/propostas --processos 8
+
+Cada registro pode ter um campo "id"; sem ele, o id é o número da linha.
+No CSV, as colunas producao_mensal, serie_geracao e retorno_investimento
+trazem JSON.
+
+Os PDFs são gravados em <saida>/<xx>/<yy>/, onde xx e yy vêm do hash do id.
+O progresso vai para <saida>/_progresso.jsonl (um registro concluído por
+linha) e os erros para <saida>/_erros.jsonl, inclusive linhas com JSON
+inválido, que são registradas e puladas sem interromper o lote. Rodar de
+novo com a mesma saída retoma de onde parou: registros já concluídos são
+pulados e os que deram erro são tentados de novo.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from app import config
+
+ARQUIVO_PROGRESSO = "_progresso.jsonl"
+ARQUIVO_ERROS = "_erros.jsonl"
+
+# Colunas do CSV que trazem JSON
+COLUNAS_JSON = ("producao_mensal", "serie_geracao", "retorno_investimento")
+
+
+def ler_registros(caminho: str, formato: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Lê os registros em streaming.
+    
+    Args:
+        caminho: Arquivo de entrada ("-" para stdin)
+        formato: "jsonl" ou "csv"
+    
+    Yields:
+        Tupla (id do registro, dados do PropostaRequest, erro). Numa linha
+        com JSON inválido, dados é None e erro traz a mensagem; nas demais,
+        erro é None
+    """
+    arquivo = sys.stdin if caminho == "-" else open(caminho, newline="", encoding="utf-8")
+    try:
+        if formato == "csv":
+            linhas = enumerate(csv.DictReader(arquivo), start=2)
+        else:
+            linhas = ((n, linha) for n, linha in enumerate(arquivo, start=1) if linha.strip())
+        
+        for numero, bruto in linhas:
+            try:
+                if formato == "csv":
+                    registro = {
+                        chave: json.loads(valor) if chave in COLUNAS_JSON and valor else valor
+                        for chave, valor in bruto.items()
+                        if valor not in (None, "")
+                    }
+                else:
+                    registro = json.loads(bruto)
+                    if not isinstance(registro, dict):
+                        raise ValueError("o registro não é um objeto JSON")
+            except ValueError as e:
+                # No CSV o id ainda é legível mesmo com uma célula JSON inválida
+                id_bruto = bruto.get("id") if formato == "csv" else None
+                yield str(id_bruto or f"linha-{numero}"), None, f"JSON inválido na linha {numero}: {e}"
+                continue
+            
+            id_registro = str(registro.pop("id", None) or f"linha-{numero}")
+            yield id_registro, registro, None
+    finally:
+        if arquivo is not sys.stdin:
+            arquivo.close()
+
+
+def diretorio_shard(saida: str, id_registro: str) -> str:
+    """Diretório <saida>/<xx>/<yy> do registro, a partir do SHA-256 do id"""
+    digest = hashlib.sha256(id_registro.encode("utf-8")).hexdigest()
+    return os.path.join(saida, digest[:2], digest[2:4])
+
+
+def carregar_concluidos(saida: str) -> Set[str]:
+    """Ids já concluídos numa execução anterior (para retomar)"""
+    caminho = os.path.join(saida, ARQUIVO_PROGRESSO)
+    concluidos = set()
+    if not os.path.exists(caminho):
+        return concluidos
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                concluidos.add(json.loads(linha)["id"])
+            except (ValueError, KeyError):
+                # Última linha truncada por uma queda: o registro é refeito
+                continue
+    return concluidos
+
+
+def _renderizar_registro(id_registro: str, dados: Dict[str, Any], saida: str) -> Dict[str, Any]:
+    """Executa no worker: valida o registro e grava o PDF no shard"""
+    from app.models.proposta import PropostaRequest
+    from app.services.renderizacao import renderizar_proposta
+    from app.services.workers import servicos_do_worker
+    
+    grafico_service, registro_marcas = servicos_do_worker()
+    diretorio = diretorio_shard(saida, id_registro)
+    os.makedirs(diretorio, exist_ok=True)
+    
+    resultado = renderizar_proposta(
+        PropostaRequest(**dados),
+        diretorio,
+        grafico_service=grafico_service,
+        registro_marcas=registro_marcas,
+        incluir_base64=False
+    )
+    return {
+        "id": id_registro,
+        "arquivo": os.path.relpath(os.path.join(diretorio, resultado.pdf_filename), saida),
+        "dados_calculados": resultado.dados_calculados
+    }
+
+
+def gerar_lote(
+    entrada: str,
+    saida: str,
+    formato: str,
+    processos: int,
+    max_em_voo: int,
+    intervalo_log: int
+) -> int:
+    """
+    Gera todas as propostas da entrada.
+    
+    No máximo `max_em_voo` registros ficam em memória/aguardando ao mesmo
+    tempo, então o consumo não depende do tamanho da entrada.
+    
+    Returns:
+        Quantidade de registros com erro
+    """
+    from app.services.workers import inicializar_worker
+    
+    os.makedirs(saida, exist_ok=True)
+    concluidos = carregar_concluidos(saida)
+    if concluidos:
+        print(f"Retomando: {len(concluidos)} registros já concluídos", file=sys.stderr)
+    
+    executor = ProcessPoolExecutor(
+        max_workers=processos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=inicializar_worker,
+        initargs=(config.MAX_RASTER_FIGURA_MB, config.RENDER_DETERMINISTICO),
+        max_tasks_per_child=config.MAX_JOBS_POR_WORKER or None
+    )
+    
+    gerados = erros = pulados = 0
+    inicio = time.monotonic()
+    em_voo = {}
+    
+    with executor, \
+            open(os.path.join(saida, ARQUIVO_PROGRESSO), "a", encoding="utf-8") as progresso, \
+            open(os.path.join(saida, ARQUIVO_ERROS), "a", encoding="utf-8") as log_erros:
+        
+        def registrar_erro(id_registro, erro):
+            nonlocal erros
+            erros += 1
+            log_erros.write(json.dumps({"id": id_registro, "erro": erro}, ensure_ascii=False) + "\n")
+            log_erros.flush()
+        
+        def coletar():
+            nonlocal gerados
+            prontos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                id_registro = em_voo.pop(futuro)
+                try:
+                    linha = futuro.result()
+                except Exception as e:
+                    registrar_erro(id_registro, str(e))
+                    continue
+                gerados += 1
+                progresso.write(json.dumps(linha, ensure_ascii=False) + "\n")
+                progresso.flush()
+                if gerados % intervalo_log == 0:
+                    taxa = gerados / (time.monotonic() - inicio)
+                    print(f"{gerados} gerados, {erros} erros, {pulados} pulados ({taxa:.1f}/s)", file=sys.stderr)
+        
+        try:
+            for id_registro, dados, erro in ler_registros(entrada, formato):
+                if id_registro in concluidos:
+                    pulados += 1
+                    continue
+                if erro is not None:
+                    registrar_erro(id_registro, erro)
+                    continue
+                if len(em_voo) >= max_em_voo:
+                    coletar()
+                em_voo[executor.submit(_renderizar_registro, id_registro, dados, saida)] = id_registro
+        finally:
+            # Mesmo se a leitura falhar, os renders já enviados entram no
+            # progresso e não são refeitos na próxima execução
+            while em_voo:
+                coletar()
+    
+    duracao = time.monotonic() - inicio
+    print(f"Concluído: {gerados} gerados, {erros} erros, {pulados} pulados em {duracao:.1f}s", file=sys.stderr)
+    return erros
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="Gera propostas em lote a partir de um arquivo JSONL ou CSV"
+    )
+    parser.add_argument("entrada", help="Arquivo .jsonl ou .csv com registros PropostaRequest ('-' para stdin)")
+    parser.add_argument("--saida", required=True, help="Diretório de saída (também guarda o progresso)")
+    parser.add_argument("--formato", choices=["jsonl", "csv"], help="Padrão: pela extensão da entrada")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="Processos de render (padrão: CPUs)")
+    parser.add_argument("--max-em-voo", type=int, default=None, help="Registros pendentes no máximo (padrão: 4 x processos)")
+    parser.add_argument("--intervalo-log", type=int, default=100, help="Mostra o progresso a cada N propostas")
+    args = parser.parse_args(argv)
+    
+    formato = args.formato or ("csv" if args.entrada.lower().endswith(".csv") else "jsonl")
+    erros = gerar_lote(
+        entrada=args.entrada,
+        saida=args.saida,
+        formato=formato,
+        processos=args.processos,
+        max_em_voo=args.max_em_voo or args.processos * 4,
+        intervalo_log=args.intervalo_log
+    )
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
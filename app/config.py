@@ -0,0 +1,65 @@
+"""
+Configurações da API
+Valores lidos de variáveis de ambiente, com padrões para o container
+"""
+
+import os
+
+# Diretório dos PDFs gerados e arquivos temporários
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "/tmp/propostas")
+
+# Controle de admissão: renders simultâneos e fila de espera limitada
+MAX_RENDERS_SIMULTANEOS = int(os.getenv("MAX_RENDERS_SIMULTANEOS", "2"))
+MAX_FILA_RENDERS = int(os.getenv("MAX_FILA_RENDERS", "8"))
+TEMPO_MAX_FILA_SEGUNDOS = float(os.getenv("TEMPO_MAX_FILA_SEGUNDOS", "30"))
+RETRY_AFTER_SEGUNDOS = int(os.getenv("RETRY_AFTER_SEGUNDOS", "5"))
+
+# Memória dos renders
+# Orçamento de crescimento de RSS por render (MB); verificado ao fim do render:
+# acima disso o pool é reciclado (não limita a memória durante o render)
+ORCAMENTO_MEMORIA_RENDER_MB = float(os.getenv("ORCAMENTO_MEMORIA_RENDER_MB", "512"))
+# Buffer RGBA máximo por figura (MB); figuras maiores são renderizadas com dpi menor
+MAX_RASTER_FIGURA_MB = float(os.getenv("MAX_RASTER_FIGURA_MB", "64"))
+
+# Reciclagem dos workers de render
+MAX_JOBS_POR_WORKER = int(os.getenv("MAX_JOBS_POR_WORKER", "50"))
+MAX_CRESCIMENTO_WORKER_MB = float(os.getenv("MAX_CRESCIMENTO_WORKER_MB", "300"))
+
+# Coalescência de requisições idênticas (Idempotency-Key ou hash do payload)
+JANELA_IDEMPOTENCIA_SEGUNDOS = float(os.getenv("JANELA_IDEMPOTENCIA_SEGUNDOS", "600"))
+# Cada resposta guardada inclui o PDF em base64 (~2 MB)
+MAX_RESPOSTAS_IDEMPOTENCIA = int(os.getenv("MAX_RESPOSTAS_IDEMPOTENCIA", "32"))
+
+# Threads por render para as etapas independentes (gráfico, tabela, cálculos...)
+MAX_THREADS_ESTAGIOS = int(os.getenv("MAX_THREADS_ESTAGIOS", "4"))
+
+# Render determinístico: mesma entrada gera o mesmo PDF byte a byte
+# (permite cache por hash de conteúdo, reuso de ETag e testes de regressão).
+# Desligado por padrão: o modo invariante do ReportLab grava 2000-01-01 como
+# data de criação e modificação em todos os PDFs
+RENDER_DETERMINISTICO = os.getenv("RENDER_DETERMINISTICO", "0").lower() in ("1", "true", "sim", "yes")
+
+# Prévia de página (PNG/WebP) para a interface de cotação
+MAX_PREVIEWS_SIMULTANEOS = int(os.getenv("MAX_PREVIEWS_SIMULTANEOS", "2"))
+MAX_PREVIEWS_CACHE = int(os.getenv("MAX_PREVIEWS_CACHE", "256"))
+
+# Marcas (parceiros): arquivos <id>.json em DIR_MARCAS; a Level5 é embutida
+DIR_MARCAS = os.getenv("DIR_MARCAS", "app/marcas")
+MARCA_PADRAO = os.getenv("MARCA_PADRAO", "level5")
+# Geradores de PDF compilados (estilos + imagens) mantidos em memória por processo
+MAX_MARCAS_COMPILADAS = int(os.getenv("MAX_MARCAS_COMPILADAS", "8"))
+
+# Montagem paralela: cada seção do PDF (capa, empresa, investimento, custo x
+# benefício...) é renderizada num processo e os PDFs são concatenados (pypdf).
+# Cada worker de render ganha até PROCESSOS_SECOES processos de seções (só
+# ReportLab, sem matplotlib): com a montagem ligada, o total de processos de
+# render é MAX_RENDERS_SIMULTANEOS x (1 + PROCESSOS_SECOES). A memória deles
+# não entra no orçamento por render (ORCAMENTO_MEMORIA_RENDER_MB)
+MONTAGEM_PARALELA = os.getenv("MONTAGEM_PARALELA", "0").lower() in ("1", "true", "sim", "yes")
+PROCESSOS_SECOES = int(os.getenv("PROCESSOS_SECOES", "3"))
+
+# Prazo das requisições de render (header X-Request-Timeout, em segundos);
+# ao esgotar o prazo ou o cliente desconectar, o render é abandonado entre etapas
+PRAZO_RENDER_SEGUNDOS = float(os.getenv("PRAZO_RENDER_SEGUNDOS", "60"))
+PRAZO_MAX_RENDER_SEGUNDOS = float(os.getenv("PRAZO_MAX_RENDER_SEGUNDOS", "300"))
+INTERVALO_DESCONEXAO_SEGUNDOS = float(os.getenv("INTERVALO_DESCONEXAO_SEGUNDOS", "0.5"))
@@ -5,22 +5,84 @@ Level5 Engenharia Elétrica
 Porta: 3493
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Header, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-import base64
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import os
-import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Optional
+
+from app import config
+from app.models.proposta import PropostaRequest, PropostaMultiplaRequest, PropostaResponse, PreviewRequest
+from app.services.renderizacao import renderizar_proposta, renderizar_proposta_opcoes
+from app.services.admissao import ControleAdmissao, FilaCheiaError
+from app.services.coalescencia import CoalescenciaRequisicoes, ConflitoIdempotenciaError, impressao_payload
+from app.services.downloads import CacheEtag, responder_download
+from app.services.metricas import metricas
+from app.services.workers import PoolRenderizacao
+from app.services.preview import CachePreview, PreviewService
+from app.services.marcas import MarcaInvalidaError, MarcaNaoEncontradaError, Marca, RegistroMarcas
+from app.services.cancelamento import SinalCancelamento
+
+OUTPUT_DIR = config.OUTPUT_DIR
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Renders rodam em processos dedicados, limitados pelo controle de admissão
+pool_renderizacao = PoolRenderizacao(
+    max_workers=config.MAX_RENDERS_SIMULTANEOS,
+    max_jobs_por_worker=config.MAX_JOBS_POR_WORKER,
+    max_crescimento_mb=config.MAX_CRESCIMENTO_WORKER_MB,
+    orcamento_render_mb=config.ORCAMENTO_MEMORIA_RENDER_MB,
+    max_raster_mb=config.MAX_RASTER_FIGURA_MB,
+    deterministico=config.RENDER_DETERMINISTICO,
+    metricas=metricas
+)
+controle_admissao = ControleAdmissao(
+    max_simultaneos=config.MAX_RENDERS_SIMULTANEOS,
+    max_fila=config.MAX_FILA_RENDERS,
+    tempo_max_fila=config.TEMPO_MAX_FILA_SEGUNDOS,
+    retry_after=config.RETRY_AFTER_SEGUNDOS
+)
+coalescencia = CoalescenciaRequisicoes(
+    janela_segundos=config.JANELA_IDEMPOTENCIA_SEGUNDOS,
+    max_concluidos=config.MAX_RESPOSTAS_IDEMPOTENCIA
+)
+cache_etag = CacheEtag()
+
+# Aqui o registro só valida IDs e serve a prévia; os geradores de PDF
+# compilados ficam no registro de cada worker
+registro_marcas = RegistroMarcas(
+    diretorio=config.DIR_MARCAS,
+    max_compilados=config.MAX_MARCAS_COMPILADAS,
+    marca_padrao=config.MARCA_PADRAO,
+    deterministico=config.RENDER_DETERMINISTICO
+)
+
+# Prévias rodam em threads próprias: não ocupam vagas de render nem a fila
+executor_preview = ThreadPoolExecutor(
+    max_workers=config.MAX_PREVIEWS_SIMULTANEOS,
+    thread_name_prefix="preview"
+)
+preview_service = PreviewService()
+cache_preview = CachePreview(max_itens=config.MAX_PREVIEWS_CACHE)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    pool_renderizacao.shutdown()
+    executor_preview.shutdown(wait=False)
 
-from app.models.proposta import PropostaRequest, PropostaResponse
-from app.services.pdf_generator import PDFGenerator
-from app.services.graficos import GraficoService
 
 app = FastAPI(
     title="API Gerador de Propostas Solar",
     description="API para geração automática de propostas comerciais para sistemas fotovoltaicos",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -31,8 +93,166 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-OUTPUT_DIR = "/tmp/propostas"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+async def _executar_render(funcao, *args):
+    """
+    Executa um render no pool de workers depois de obter vaga no controle de admissão.
+    
+    Se a task for cancelada (ninguém mais aguarda o resultado), o worker é
+    avisado e abandona o render antes da próxima etapa; a vaga só é
+    liberada quando ele para.
+    """
+    cancelamento = SinalCancelamento(OUTPUT_DIR)
+    try:
+        async with controle_admissao.vaga():
+            futuro = asyncio.wrap_future(pool_renderizacao.submit(funcao, *args, cancelamento=cancelamento))
+            try:
+                resultado = await asyncio.shield(futuro)
+            except asyncio.CancelledError:
+                cancelamento.cancelar()
+                await asyncio.wait([futuro])
+                # Consome o RenderCanceladoError do worker (evita o log
+                # "Future exception was never retrieved")
+                if not futuro.cancelled():
+                    futuro.exception()
+                raise
+    except asyncio.CancelledError:
+        metricas.incrementar("renders_cancelados")
+        raise
+    except FilaCheiaError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar proposta: {str(e)}")
+    finally:
+        cancelamento.limpar()
+    
+    for estagio, ms in (resultado.tempos_estagios or {}).items():
+        metricas.registrar(f"estagio_{estagio.split('_')[0]}_ms", ms)
+    return resultado
+
+
+def _prazo_requisicao(request_timeout: Optional[str]) -> float:
+    """
+    Prazo da requisição em segundos.
+    
+    Args:
+        request_timeout: Valor do header X-Request-Timeout (None = prazo padrão)
+        
+    Returns:
+        Prazo limitado a PRAZO_MAX_RENDER_SEGUNDOS
+    """
+    if request_timeout is None:
+        return config.PRAZO_RENDER_SEGUNDOS
+    try:
+        prazo = float(request_timeout)
+    except ValueError:
+        prazo = 0.0
+    if not prazo > 0:
+        raise HTTPException(status_code=400, detail="X-Request-Timeout deve ser um número de segundos maior que zero")
+    return min(prazo, config.PRAZO_MAX_RENDER_SEGUNDOS)
+
+
+async def _aguardar_desconexao(http_request: Request):
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(config.INTERVALO_DESCONEXAO_SEGUNDOS)
+
+
+async def _aguardar_cliente(trabalho, http_request: Request, prazo: float):
+    """
+    Aguarda `trabalho` enquanto o cliente estiver conectado e dentro do prazo.
+    
+    Ao desistir, a espera é cancelada; com coalescência, o render só é
+    abandonado quando nenhuma outra requisição aguarda por ele.
+    
+    Raises:
+        HTTPException: 504 com o prazo esgotado, 499 com o cliente desconectado,
+            503 se o render compartilhado foi cancelado por outra requisição
+    """
+    tarefa = asyncio.ensure_future(trabalho)
+    vigia = asyncio.ensure_future(_aguardar_desconexao(http_request))
+    try:
+        concluidos, _ = await asyncio.wait({tarefa, vigia}, timeout=prazo, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        vigia.cancel()
+        if not tarefa.done():
+            tarefa.cancel()
+    
+    if tarefa in concluidos:
+        if tarefa.cancelled():
+            # O render compartilhado foi cancelado por outra requisição no
+            # meio da espera; o CancelledError não pode sair do handler
+            raise HTTPException(
+                status_code=503,
+                detail="Render compartilhado cancelado; tente novamente",
+                headers={"Retry-After": "1"}
+            )
+        return tarefa.result()
+    if vigia in concluidos:
+        metricas.incrementar("cancelamentos_desconexao")
+        raise HTTPException(status_code=499, detail="Cliente desconectou antes do fim do render")
+    metricas.incrementar("cancelamentos_prazo")
+    raise HTTPException(status_code=504, detail=f"Prazo da requisição esgotado ({prazo:g}s)")
+
+
+def _definicao_marca(marca_id: Optional[str]) -> Marca:
+    """
+    Definição da marca pedida, com os erros do registro convertidos em HTTP.
+    
+    Raises:
+        HTTPException: 422 para marca desconhecida, 500 (com o motivo) para
+            arquivo de marca inválido no servidor
+    """
+    try:
+        return registro_marcas.definicao(marca_id)
+    except MarcaNaoEncontradaError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except MarcaInvalidaError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _executar_render_coalescido(rota, funcao, request, idempotency_key, response, http_request, request_timeout):
+    """
+    Agrupa requisições idênticas num único render.
+    
+    A chave é o header Idempotency-Key (quando enviado) ou o hash canônico do
+    payload. Quem recebe um resultado compartilhado ganha o header
+    Idempotent-Replayed: true. Cada requisição aguarda até o seu prazo
+    (header X-Request-Timeout) ou até desconectar.
+    """
+    prazo = _prazo_requisicao(request_timeout)
+    _definicao_marca(request.marca)
+    
+    impressao = impressao_payload(request)
+    if idempotency_key:
+        chave = f"{rota}:chave:{idempotency_key}"
+    else:
+        chave = f"{rota}:payload:{impressao}"
+    
+    try:
+        resultado, compartilhado = await _aguardar_cliente(
+            coalescencia.executar(
+                chave,
+                impressao,
+                lambda: _executar_render(funcao, request, OUTPUT_DIR)
+            ),
+            http_request,
+            prazo
+        )
+    except ConflitoIdempotenciaError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if compartilhado:
+        response.headers["Idempotent-Replayed"] = "true"
+        metricas.incrementar("requisicoes_coalescidas")
+    if resultado.tempos_estagios:
+        response.headers["Server-Timing"] = ", ".join(
+            f"{estagio};dur={ms}" for estagio, ms in resultado.tempos_estagios.items()
+        )
+    return resultado
 
 
 @app.get("/")
@@ -52,88 +272,122 @@ async def health_check():
     }
 
 
-@app.post("/api/v1/proposta/gerar", response_model=PropostaResponse)
-async def gerar_proposta(request: PropostaRequest):
-    try:
-        grafico_service = GraficoService()
-        pdf_generator = PDFGenerator()
-        
-        investimento_total = request.investimento_kit_fotovoltaico + request.investimento_mao_de_obra
-        
-        ano_payback = None
-        valor_payback = None
-        for item in request.retorno_investimento:
-            if item.saldo > 0:
-                ano_payback = item.ano
-                valor_payback = item.saldo
-                break
-        
-        economia_25_anos = request.retorno_investimento[-1].saldo if request.retorno_investimento else 0
-        
-        grafico_producao_path = grafico_service.gerar_grafico_producao(
-            dados_producao=request.producao_mensal,
-            quantidade_modulos=request.modulos_quantidade,
-            output_dir=OUTPUT_DIR
-        )
-        
-        tabela_retorno_path = grafico_service.gerar_tabela_retorno(
-            dados_retorno=request.retorno_investimento,
-            output_dir=OUTPUT_DIR
-        )
-        
-        nome_arquivo = f"proposta_{request.nome.lower().replace(' ', '_')}_{uuid.uuid4().hex[:8]}.pdf"
-        pdf_path = os.path.join(OUTPUT_DIR, nome_arquivo)
-        
-        pdf_generator.gerar_proposta_plana(
-            nome_cliente=request.nome,
-            modulos_quantidade=request.modulos_quantidade,
-            especificacoes_modulo=request.especificacoes_modulo,
-            inversores_quantidade=request.inversores_quantidade,
-            especificacoes_inversores=request.especificacoes_inversores,
-            investimento_kit=request.investimento_kit_fotovoltaico,
-            investimento_mao_de_obra=request.investimento_mao_de_obra,
-            investimento_total=investimento_total,
-            grafico_producao_path=grafico_producao_path,
-            tabela_retorno_path=tabela_retorno_path,
-            ano_payback=ano_payback,
-            valor_payback=valor_payback,
-            economia_25_anos=economia_25_anos,
-            output_path=pdf_path
-        )
-        
-        with open(pdf_path, "rb") as f:
-            pdf_base64 = base64.b64encode(f.read()).decode("utf-8")
-        
-        if os.path.exists(grafico_producao_path):
-            os.remove(grafico_producao_path)
-        if os.path.exists(tabela_retorno_path):
-            os.remove(tabela_retorno_path)
-        
-        return PropostaResponse(
-            success=True,
-            message="Proposta gerada com sucesso",
-            pdf_filename=nome_arquivo,
-            pdf_url=f"/api/v1/download/{nome_arquivo}",
-            pdf_base64=pdf_base64,
-            dados_calculados={
-                "investimento_total": investimento_total,
-                "ano_payback": ano_payback,
-                "valor_payback": valor_payback,
-                "economia_25_anos": economia_25_anos
-            }
+@app.get("/api/v1/ready")
+async def readiness_check():
+    """Prontidão para o load balancer: 503 quando a fila de renders está cheia"""
+    estado = controle_admissao.estado()
+    conteudo = {
+        "status": "saturated" if estado["saturado"] else "ready",
+        "timestamp": datetime.now().isoformat(),
+        **estado
+    }
+    if estado["saturado"]:
+        return JSONResponse(
+            status_code=503,
+            content=conteudo,
+            headers={"Retry-After": str(config.RETRY_AFTER_SEGUNDOS)}
         )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar proposta: {str(e)}")
+    return conteudo
+
+
+@app.get("/api/v1/metricas")
+async def metricas_renderizacao():
+    """Contadores e medições de memória dos renders deste processo"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "admissao": controle_admissao.estado(),
+        "coalescencia": coalescencia.estado(),
+        **metricas.snapshot()
+    }
+
+
+@app.get("/api/v1/marcas")
+async def listar_marcas():
+    """Marcas disponíveis para o campo `marca` das propostas (e as com arquivo inválido)"""
+    return {
+        "padrao": config.MARCA_PADRAO,
+        "marcas": registro_marcas.ids(),
+        "invalidas": registro_marcas.invalidas()
+    }
 
 
-@app.get("/api/v1/download/{filename}")
-async def download_proposta(filename: str):
+@app.post("/api/v1/proposta/gerar", response_model=PropostaResponse)
+async def gerar_proposta(
+    request: PropostaRequest,
+    response: Response,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    x_request_timeout: Optional[str] = Header(None)
+):
+    return await _executar_render_coalescido(
+        "gerar", renderizar_proposta, request, idempotency_key, response, http_request, x_request_timeout
+    )
+
+
+@app.post("/api/v1/proposta/gerar-opcoes", response_model=PropostaResponse)
+async def gerar_proposta_opcoes(
+    request: PropostaMultiplaRequest,
+    response: Response,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    x_request_timeout: Optional[str] = Header(None)
+):
+    """Gera um único PDF com várias opções de sistema para o mesmo cliente"""
+    return await _executar_render_coalescido(
+        "gerar-opcoes", renderizar_proposta_opcoes, request, idempotency_key, response, http_request, x_request_timeout
+    )
+
+
+@app.post("/api/v1/proposta/preview")
+async def preview_proposta(request: PreviewRequest):
+    """
+    Prévia rápida de uma página (3 ou 4) em PNG/WebP, sem gerar o PDF.
+    
+    O resultado fica em cache pelo hash da entrada; o header X-Preview-Cache
+    indica hit ou miss.
+    """
+    marca = _definicao_marca(request.marca)
+    
+    chave = impressao_payload(request)
+    imagem = cache_preview.obter(chave)
+    status_cache = "hit"
+    
+    if imagem is None:
+        status_cache = "miss"
+        try:
+            imagem = await asyncio.wrap_future(executor_preview.submit(preview_service.renderizar, request, marca))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Erro ao gerar prévia: {str(e)}")
+        cache_preview.guardar(chave, imagem)
+    
+    metricas.incrementar(f"previews_cache_{status_cache}")
+    return Response(
+        content=imagem,
+        media_type=f"image/{request.formato}",
+        headers={"X-Preview-Cache": status_cache, "Cache-Control": "private, max-age=60"}
+    )
+
+
+@app.api_route("/api/v1/download/{filename}", methods=["GET", "HEAD"])
+async def download_proposta(
+    filename: str,
+    if_none_match: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None)
+):
     file_path = os.path.join(OUTPUT_DIR, filename)
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Arquivo não encontrado")
-    return FileResponse(path=file_path, filename=filename, media_type="application/pdf")
-
+    # Hash do arquivo (primeira vez) e stat são I/O bloqueante: fora do event loop
+    return await run_in_threadpool(
+        responder_download,
+        file_path,
+        filename,
+        cache_etag,
+        if_none_match=if_none_match,
+        range_header=range_header,
+        if_range=if_range
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,13 +1,21 @@
 from app.models.proposta import (
     ProducaoMensalModel,
+    SerieGeracaoModel,
     RetornoInvestimentoModel,
     PropostaRequest,
+    PreviewRequest,
+    OpcaoSistemaModel,
+    PropostaMultiplaRequest,
     PropostaResponse
 )
 
 __all__ = [
     "ProducaoMensalModel",
+    "SerieGeracaoModel",
     "RetornoInvestimentoModel",
     "PropostaRequest",
+    "PreviewRequest",
+    "OpcaoSistemaModel",
+    "PropostaMultiplaRequest",
     "PropostaResponse"
 ]
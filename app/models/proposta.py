@@ -1,8 +1,13 @@
 """
 Modelos Pydantic para validação de dados da API
 """
-from pydantic import BaseModel, Field
-from typing import List, Optional, Union, Dict, Any
+import base64
+import binascii
+import calendar
+
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional, Union, Dict, Any, Literal
 
 
 class ProducaoMensalModel(BaseModel):
@@ -11,6 +16,62 @@ class ProducaoMensalModel(BaseModel):
     geracao_total: float = Field(..., ge=0, description="Geração total estimada em kWh")
 
 
+class SerieGeracaoModel(BaseModel):
+    """
+    Série de geração horária ou diária em kWh (ex: saída de simulação PV).
+    A API agrega a série em produção mensal; os valores ficam num array
+    simples ou num buffer float little-endian em base64, nunca em um
+    modelo por ponto.
+    """
+    resolucao: Literal["horaria", "diaria"] = Field(..., description="horaria (8760/8784 pontos) ou diaria (365/366)")
+    valores: Optional[List[float]] = Field(None, description="Geração de cada hora/dia em kWh")
+    valores_base64: Optional[str] = Field(None, description="Alternativa a valores: buffer float little-endian em base64")
+    tipo: Literal["float32", "float64"] = Field("float64", description="Tipo dos elementos de valores_base64")
+    ano: Optional[int] = Field(None, ge=1900, le=2200, description="Ano da série (padrão: deduzido do número de pontos)")
+    
+    def como_array(self) -> np.ndarray:
+        """Valores da série como array float64"""
+        if self.valores is not None:
+            return np.asarray(self.valores, dtype=np.float64)
+        buffer = base64.b64decode(self.valores_base64, validate=True)
+        return np.frombuffer(buffer, dtype="<f4" if self.tipo == "float32" else "<f8").astype(np.float64)
+    
+    @model_validator(mode="after")
+    def validar_valores(self):
+        if (self.valores is None) == (self.valores_base64 is None):
+            raise ValueError("Informe exatamente um entre valores e valores_base64")
+        
+        if self.valores_base64 is not None:
+            tamanho_item = 4 if self.tipo == "float32" else 8
+            try:
+                tamanho = len(base64.b64decode(self.valores_base64, validate=True))
+            except binascii.Error:
+                raise ValueError("valores_base64 não é base64 válido")
+            if tamanho % tamanho_item:
+                raise ValueError(f"valores_base64 deve ter múltiplo de {tamanho_item} bytes ({self.tipo})")
+        
+        pontos_por_dia = 24 if self.resolucao == "horaria" else 1
+        if self.ano is None:
+            esperados = (365 * pontos_por_dia, 366 * pontos_por_dia)
+        else:
+            esperados = ((366 if calendar.isleap(self.ano) else 365) * pontos_por_dia,)
+        valores = self.como_array()
+        if len(valores) not in esperados:
+            raise ValueError(
+                f"Série {self.resolucao} deve ter {' ou '.join(map(str, esperados))} pontos, recebidos {len(valores)}"
+            )
+        if not np.isfinite(valores).all() or (valores < 0).any():
+            raise ValueError("Série de geração deve ter apenas valores finitos e não negativos")
+        return self
+
+
+def _validar_fonte_producao(modelo):
+    """Exige exatamente uma fonte de produção: producao_mensal ou serie_geracao"""
+    if (modelo.producao_mensal is None) == (modelo.serie_geracao is None):
+        raise ValueError("Informe exatamente um entre producao_mensal e serie_geracao")
+    return modelo
+
+
 class RetornoInvestimentoModel(BaseModel):
     """Dados de retorno do investimento por ano"""
     ano: int = Field(..., ge=1, le=25, description="Ano (1-25)")
@@ -22,14 +83,52 @@ class RetornoInvestimentoModel(BaseModel):
 class PropostaRequest(BaseModel):
     """Request para geração de proposta - estrutura plana"""
     nome: str = Field(..., description="Nome do cliente")
+    marca: Optional[str] = Field(None, pattern=r"^[a-z0-9_-]{1,64}$", description="ID da marca (padrão: MARCA_PADRAO)")
     modulos_quantidade: int = Field(..., ge=1, description="Quantidade de módulos")
     especificacoes_modulo: str = Field(..., description="Ex: 620W Mono Honor Solar")
     inversores_quantidade: int = Field(..., ge=1, description="Quantidade de inversores")
     especificacoes_inversores: str = Field(..., description="Ex: SOFAR 20kW AFCI")
     investimento_kit_fotovoltaico: float = Field(..., ge=0, description="Valor do kit")
     investimento_mao_de_obra: float = Field(..., ge=0, description="Valor da mão de obra")
-    producao_mensal: List[ProducaoMensalModel]
+    producao_mensal: Optional[List[ProducaoMensalModel]] = Field(None, description="12 meses + média, já agregados")
+    serie_geracao: Optional[SerieGeracaoModel] = Field(None, description="Alternativa a producao_mensal: série horária ou diária")
     retorno_investimento: List[RetornoInvestimentoModel]
+    
+    @model_validator(mode="after")
+    def validar_producao(self):
+        return _validar_fonte_producao(self)
+
+
+class PreviewRequest(PropostaRequest):
+    """Request da prévia de uma página da proposta em baixa resolução"""
+    pagina: int = Field(4, ge=3, le=4, description="Página: 3 (investimento) ou 4 (custo x benefício)")
+    formato: Literal["png", "webp"] = Field("png", description="Formato da imagem")
+    largura: int = Field(600, ge=200, le=1240, description="Largura da imagem em pixels")
+
+
+class OpcaoSistemaModel(BaseModel):
+    """Uma opção de sistema (kit) dentro de uma proposta com várias opções"""
+    titulo: Optional[str] = Field(None, description="Ex: Opção 1 - 60 módulos (padrão: 'Opção N')")
+    modulos_quantidade: int = Field(..., ge=1, description="Quantidade de módulos")
+    especificacoes_modulo: str = Field(..., description="Ex: 620W Mono Honor Solar")
+    inversores_quantidade: int = Field(..., ge=1, description="Quantidade de inversores")
+    especificacoes_inversores: str = Field(..., description="Ex: SOFAR 20kW AFCI")
+    investimento_kit_fotovoltaico: float = Field(..., ge=0, description="Valor do kit")
+    investimento_mao_de_obra: float = Field(..., ge=0, description="Valor da mão de obra")
+    producao_mensal: Optional[List[ProducaoMensalModel]] = Field(None, description="12 meses + média, já agregados")
+    serie_geracao: Optional[SerieGeracaoModel] = Field(None, description="Alternativa a producao_mensal: série horária ou diária")
+    retorno_investimento: List[RetornoInvestimentoModel]
+    
+    @model_validator(mode="after")
+    def validar_producao(self):
+        return _validar_fonte_producao(self)
+
+
+class PropostaMultiplaRequest(BaseModel):
+    """Request para proposta com várias opções de sistema para o mesmo cliente"""
+    nome: str = Field(..., description="Nome do cliente")
+    marca: Optional[str] = Field(None, pattern=r"^[a-z0-9_-]{1,64}$", description="ID da marca (padrão: MARCA_PADRAO)")
+    opcoes: List[OpcaoSistemaModel] = Field(..., min_length=1, max_length=5, description="Opções de sistema (1 a 5)")
 
 
 class PropostaResponse(BaseModel):
@@ -40,3 +139,4 @@ class PropostaResponse(BaseModel):
     pdf_url: Optional[str] = None
     pdf_base64: Optional[str] = None
     dados_calculados: Optional[Dict[str, Any]] = None
+    tempos_estagios: Optional[Dict[str, float]] = Field(None, description="Tempo de cada etapa do render em ms")
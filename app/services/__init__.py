@@ -1,9 +1,13 @@
 from app.services.graficos import GraficoService
 from app.services.calculos import CalculoService
 from app.services.pdf_generator import PDFGenerator
+from app.services.preview import PreviewService
+from app.services.marcas import RegistroMarcas
 
 __all__ = [
     "GraficoService",
     "CalculoService",
-    "PDFGenerator"
+    "PDFGenerator",
+    "PreviewService",
+    "RegistroMarcas"
 ]
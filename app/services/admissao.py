@@ -0,0 +1,101 @@
+"""
+Controle de Admissão
+Limita renders simultâneos e o tamanho da fila de espera da API
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+
+
+class FilaCheiaError(Exception):
+    """Render recusado: fila de espera cheia ou tempo máximo de espera esgotado"""
+    
+    def __init__(self, mensagem: str, retry_after: int):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+
+class ControleAdmissao:
+    """
+    Semáforo com fila limitada para os renders de proposta.
+    
+    Até `max_simultaneos` renders rodam ao mesmo tempo; até `max_fila`
+    requisições aguardam uma vaga. Acima disso a requisição é recusada na
+    hora, em vez de degradar a latência (e a memória) de todas as outras.
+    """
+    
+    def __init__(
+        self,
+        max_simultaneos: int,
+        max_fila: int,
+        tempo_max_fila: float,
+        retry_after: int
+    ):
+        self.max_simultaneos = max_simultaneos
+        self.max_fila = max_fila
+        self.tempo_max_fila = tempo_max_fila
+        self.retry_after = retry_after
+        
+        self._semaforo = asyncio.Semaphore(max_simultaneos)
+        self._ativos = 0
+        self._aguardando = 0
+        self._total_admitidos = 0
+        self._total_recusados = 0
+    
+    @property
+    def saturado(self) -> bool:
+        """True quando todas as vagas estão ocupadas e a fila está cheia"""
+        return self._ativos + self._aguardando >= self.max_simultaneos + self.max_fila
+    
+    @asynccontextmanager
+    async def vaga(self):
+        """
+        Aguarda uma vaga de render.
+        
+        Raises:
+            FilaCheiaError: Se a fila estiver cheia ou a espera passar de `tempo_max_fila`
+        """
+        # Contadores atualizados antes de qualquer await: a decisão não sofre corrida
+        if self.saturado:
+            self._total_recusados += 1
+            raise FilaCheiaError("Servidor ocupado: fila de renders cheia", self.retry_after)
+        
+        self._aguardando += 1
+        try:
+            if self._semaforo.locked():
+                await asyncio.wait_for(self._semaforo.acquire(), timeout=self.tempo_max_fila)
+            else:
+                await self._semaforo.acquire()
+        except asyncio.TimeoutError:
+            self._total_recusados += 1
+            raise FilaCheiaError("Servidor ocupado: tempo de espera na fila esgotado", self.retry_after)
+        finally:
+            self._aguardando -= 1
+        
+        self._ativos += 1
+        self._total_admitidos += 1
+        try:
+            yield
+        finally:
+            self._ativos -= 1
+            self._semaforo.release()
+    
+    def estado(self) -> Dict[str, Any]:
+        """
+        Retorna a ocupação atual.
+        
+        Returns:
+            Dict com renders ativos, fila, limites, saturação (0 a 1) e contadores
+        """
+        capacidade = self.max_simultaneos + self.max_fila
+        return {
+            "renders_ativos": self._ativos,
+            "renders_aguardando": self._aguardando,
+            "max_renders_simultaneos": self.max_simultaneos,
+            "max_fila": self.max_fila,
+            "saturacao": round((self._ativos + self._aguardando) / capacidade, 3) if capacidade else 1.0,
+            "saturado": self.saturado,
+            "total_admitidos": self._total_admitidos,
+            "total_recusados": self._total_recusados
+        }
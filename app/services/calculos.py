@@ -3,8 +3,30 @@ Serviço de Cálculos
 Funções auxiliares para cálculos da proposta solar
 """
 
-from typing import List, Tuple, Optional
-from app.models.proposta import RetornoInvestimentoModel
+from functools import lru_cache
+from typing import List, Tuple, Optional, Dict, Any
+
+import numpy as np
+
+from app.models.proposta import ProducaoMensalModel, RetornoInvestimentoModel, SerieGeracaoModel
+
+
+@lru_cache(maxsize=16)
+def _indices_mes(resolucao: str, pontos: int, ano: Optional[int]) -> np.ndarray:
+    """
+    Mês (0-11) de cada ponto da série, calculado uma vez por formato.
+    
+    Sem ano informado, usa um ano bissexto (2024) ou não (2023) conforme o
+    número de pontos.
+    """
+    unidade = "h" if resolucao == "horaria" else "D"
+    if ano is None:
+        ano = 2024 if pontos in (8784, 366) else 2023
+    datas = np.datetime64(f"{ano}-01-01", unidade) + np.arange(pontos)
+    # datetime64[M] conta meses desde 1970-01, então o resto por 12 é o mês
+    indices = (datas.astype("datetime64[M]").astype(np.int64) % 12).astype(np.intp)
+    indices.setflags(write=False)
+    return indices
 
 
 class CalculoService:
@@ -97,3 +119,71 @@ class CalculoService:
         if quantidade_modulos == 0:
             return 0.0
         return geracao_total / quantidade_modulos
+    
+    def calcular_resumo_financeiro(
+        self,
+        kit_fotovoltaico: float,
+        mao_de_obra: float,
+        dados_retorno: List[RetornoInvestimentoModel]
+    ) -> Dict[str, Any]:
+        """
+        Reúne os números calculados exibidos na proposta.
+        
+        Args:
+            kit_fotovoltaico: Valor do kit fotovoltaico
+            mao_de_obra: Valor da mão de obra, projeto e periféricos
+            dados_retorno: Lista com dados de retorno por ano
+            
+        Returns:
+            Dict com investimento_total, ano_payback, valor_payback e economia_25_anos
+        """
+        ano_payback, valor_payback = self.encontrar_ano_payback(dados_retorno)
+        return {
+            "investimento_total": self.calcular_investimento_total(kit_fotovoltaico, mao_de_obra),
+            "ano_payback": ano_payback,
+            "valor_payback": valor_payback,
+            "economia_25_anos": self.calcular_economia_total(dados_retorno)
+        }
+    
+    def agregar_serie_mensal(self, serie: SerieGeracaoModel) -> List[ProducaoMensalModel]:
+        """
+        Agrega uma série horária ou diária em produção mensal (12 meses + média).
+        
+        A soma por mês é vetorizada (np.bincount sobre o índice do mês de
+        cada ponto); só os 13 itens do resultado viram modelos.
+        
+        Args:
+            serie: Série de geração validada
+            
+        Returns:
+            Lista de ProducaoMensalModel no mesmo formato de producao_mensal
+        """
+        valores = serie.como_array()
+        indices = _indices_mes(serie.resolucao, len(valores), serie.ano)
+        totais = np.bincount(indices, weights=valores, minlength=12)
+        
+        producao = [
+            ProducaoMensalModel(mes=mes, geracao_total=round(float(total), 2))
+            for mes, total in enumerate(totais, start=1)
+        ]
+        producao.append(ProducaoMensalModel(mes="média", geracao_total=round(float(totais.mean()), 2)))
+        return producao
+    
+    def obter_producao_mensal(
+        self,
+        producao_mensal: Optional[List[ProducaoMensalModel]],
+        serie_geracao: Optional[SerieGeracaoModel]
+    ) -> List[ProducaoMensalModel]:
+        """
+        Produção mensal do request, agregando a série quando for o caso.
+        
+        Args:
+            producao_mensal: Produção já agregada (ou None)
+            serie_geracao: Série horária/diária (ou None)
+            
+        Returns:
+            Produção mensal (12 meses + média)
+        """
+        if serie_geracao is not None:
+            return self.agregar_serie_mensal(serie_geracao)
+        return producao_mensal
@@ -0,0 +1,52 @@
+"""
+Cancelamento de Renders
+Sinal que o servidor usa para avisar o worker que ninguém mais espera por
+um render (cliente desconectou ou prazo da requisição esgotado)
+"""
+
+import os
+import uuid
+
+
+class RenderCanceladoError(Exception):
+    """Render abandonado entre etapas porque ninguém mais espera pelo resultado"""
+
+
+class SinalCancelamento:
+    """
+    Sinal de cancelamento entre o servidor e o processo worker.
+    
+    É um arquivo-marcador em `diretorio`: o servidor o cria ao desistir do
+    render e o worker verifica se ele existe antes de iniciar cada etapa.
+    O objeto só guarda o caminho, então atravessa o pickle do
+    ProcessPoolExecutor sem depender de um processo gerenciador.
+    """
+    
+    def __init__(self, diretorio: str):
+        self.caminho = os.path.join(diretorio, f".cancelar_{uuid.uuid4().hex}")
+    
+    def cancelar(self) -> None:
+        """Pede ao worker que abandone o render (lado do servidor)"""
+        with open(self.caminho, "w"):
+            pass
+    
+    @property
+    def cancelado(self) -> bool:
+        return os.path.exists(self.caminho)
+    
+    def verificar(self) -> None:
+        """
+        Interrompe o render se o cancelamento foi pedido (lado do worker).
+        
+        Raises:
+            RenderCanceladoError: Se o servidor já desistiu do render
+        """
+        if self.cancelado:
+            raise RenderCanceladoError("Render cancelado: ninguém mais aguarda o resultado")
+    
+    def limpar(self) -> None:
+        """Remove o marcador (chamado pelo servidor quando o render termina)"""
+        try:
+            os.remove(self.caminho)
+        except FileNotFoundError:
+            pass
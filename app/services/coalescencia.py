@@ -0,0 +1,156 @@
+"""
+Coalescência de Requisições
+Single-flight: requisições idênticas em andamento compartilham um único
+render, e resultados concluídos são lembrados por uma janela de tempo
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from pydantic import BaseModel
+
+
+class ConflitoIdempotenciaError(Exception):
+    """A mesma Idempotency-Key foi reutilizada com um payload diferente"""
+
+
+def impressao_payload(request: BaseModel) -> str:
+    """
+    Hash SHA-256 do payload em forma canônica (chaves ordenadas, sem espaços).
+    
+    Args:
+        request: Request Pydantic já validado
+        
+    Returns:
+        Hash em hexadecimal
+    """
+    canonico = json.dumps(
+        request.model_dump(mode="json"),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+class CoalescenciaRequisicoes:
+    """
+    Agrupa requisições com a mesma chave.
+    
+    A primeira requisição dispara o trabalho numa task própria; as demais
+    aguardam a mesma task. Assim, se quem disparou desconectar, as outras
+    não são afetadas; o trabalho só é cancelado quando todas as
+    requisições que o aguardam desistem. Resultados bem-sucedidos ficam disponíveis por
+    `janela_segundos` (até `max_concluidos` chaves, LRU). Erros não são
+    lembrados: a próxima tentativa renderiza de novo.
+    """
+    
+    def __init__(self, janela_segundos: float, max_concluidos: int):
+        self.janela_segundos = janela_segundos
+        self.max_concluidos = max_concluidos
+        self._em_andamento: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self._interessados: Dict[asyncio.Task, int] = {}
+        self._concluidos: "OrderedDict[str, Tuple[str, float, Any]]" = OrderedDict()
+        self._total_coalescidos = 0
+        self._total_reaproveitados = 0
+        self._total_cancelados = 0
+    
+    def _buscar_concluido(self, chave: str, impressao: str):
+        item = self._concluidos.get(chave)
+        if item is None:
+            return None
+        impressao_salva, expira_em, resultado = item
+        if expira_em < time.monotonic():
+            del self._concluidos[chave]
+            return None
+        if impressao_salva != impressao:
+            raise ConflitoIdempotenciaError("Idempotency-Key já usada com outro payload")
+        self._concluidos.move_to_end(chave)
+        return item
+    
+    async def executar(
+        self,
+        chave: str,
+        impressao: str,
+        fabrica: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Executa `fabrica()` uma única vez por chave.
+        
+        Args:
+            chave: Idempotency-Key ou hash do payload (já com o prefixo da rota)
+            impressao: Hash do payload, para detectar chave reutilizada
+            fabrica: Função que cria a corrotina do trabalho
+            
+        Returns:
+            Tupla (resultado, compartilhado). `compartilhado` é True quando o
+            resultado veio de outra requisição (em andamento ou concluída)
+            
+        Raises:
+            ConflitoIdempotenciaError: Se a chave já foi usada com outro payload
+        """
+        concluido = self._buscar_concluido(chave, impressao)
+        if concluido is not None:
+            self._total_reaproveitados += 1
+            return concluido[2], True
+        
+        em_andamento = self._em_andamento.get(chave)
+        if em_andamento is not None:
+            impressao_salva, task = em_andamento
+            if impressao_salva != impressao:
+                raise ConflitoIdempotenciaError("Idempotency-Key já usada com outro payload")
+            self._total_coalescidos += 1
+            return await self._aguardar(chave, task), True
+        
+        task = asyncio.ensure_future(fabrica())
+        self._em_andamento[chave] = (impressao, task)
+        task.add_done_callback(lambda t: self._finalizar(chave, impressao, t))
+        return await self._aguardar(chave, task), False
+    
+    async def _aguardar(self, chave: str, task: asyncio.Task) -> Any:
+        """
+        Aguarda a task compartilhada; se o último interessado desistir, cancela o trabalho.
+        
+        A task cancelada sai de `_em_andamento` na hora, sem esperar o worker
+        parar: uma nova tentativa idêntica (ex: retry após timeout) dispara um
+        render novo em vez de herdar o cancelamento.
+        """
+        self._interessados[task] = self._interessados.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._interessados[task] -= 1
+            if not self._interessados[task]:
+                del self._interessados[task]
+                if not task.done():
+                    task.cancel()
+                    self._total_cancelados += 1
+                    self._remover_em_andamento(chave, task)
+    
+    def _remover_em_andamento(self, chave: str, task: asyncio.Task) -> None:
+        """Remove a chave só se ainda apontar para `task` (um retry pode já ter outra)"""
+        em_andamento = self._em_andamento.get(chave)
+        if em_andamento is not None and em_andamento[1] is task:
+            del self._em_andamento[chave]
+    
+    def _finalizar(self, chave: str, impressao: str, task: asyncio.Task) -> None:
+        self._remover_em_andamento(chave, task)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._concluidos[chave] = (impressao, time.monotonic() + self.janela_segundos, task.result())
+        self._concluidos.move_to_end(chave)
+        while len(self._concluidos) > self.max_concluidos:
+            self._concluidos.popitem(last=False)
+    
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "em_andamento": len(self._em_andamento),
+            "concluidos_lembrados": len(self._concluidos),
+            "total_coalescidos": self._total_coalescidos,
+            "total_reaproveitados": self._total_reaproveitados,
+            "total_cancelados": self._total_cancelados
+        }
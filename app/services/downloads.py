@@ -0,0 +1,285 @@
+"""
+Serviço de Downloads
+ETag forte, GET condicional, requisições Range e cabeçalhos de cache
+para os PDFs gerados
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+# Nomes endereçados por conteúdo: proposta_<cliente>_<sha256[:16]>.pdf
+PADRAO_NOME_ENDERECADO = re.compile(r"^proposta_.+_([0-9a-f]{16})\.pdf$")
+
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "private, no-cache"
+
+# Um único intervalo de bytes (RFC 9110): "inicio-[fim]" ou "-sufixo"
+PADRAO_INTERVALO = re.compile(r"^(\d*)-(\d*)$")
+
+
+class IntervaloInsatisfazivelError(Exception):
+    """Range sintaticamente válido que não cabe no arquivo (resposta 416)"""
+
+
+def hash_conteudo(conteudo: bytes) -> str:
+    """
+    Calcula o hash SHA-256 usado no nome do arquivo e no ETag.
+    
+    Args:
+        conteudo: Bytes do arquivo
+        
+    Returns:
+        Hash SHA-256 em hexadecimal
+    """
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+class CacheEtag:
+    """
+    Cache em memória do hash SHA-256 de cada arquivo.
+    
+    A chave inclui mtime e tamanho, então um arquivo regravado é re-hasheado.
+    """
+    
+    def __init__(self, max_itens: int = 1024):
+        self.max_itens = max_itens
+        self._itens: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def obter(self, caminho: str, stat_result: os.stat_result) -> str:
+        chave = (caminho, stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return self._itens[chave]
+        
+        sha = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(bloco)
+        digest = sha.hexdigest()
+        
+        with self._lock:
+            self._itens[chave] = digest
+            if len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        return digest
+
+
+def _content_disposition(filename: str) -> str:
+    """Content-Disposition de anexo, com filename* quando houver caracteres não ASCII"""
+    filename_codificado = quote(filename)
+    if filename_codificado != filename:
+        return f"attachment; filename*=utf-8''{filename_codificado}"
+    return f'attachment; filename="{filename}"'
+
+
+def etag_corresponde(cabecalho: Optional[str], etag: str, forte: bool = False) -> bool:
+    """
+    Compara If-None-Match / If-Range com o ETag.
+    
+    Args:
+        cabecalho: Valor do header
+        etag: ETag do arquivo (forte, entre aspas)
+        forte: Comparação forte (RFC 9110, exigida no If-Range): o header
+            precisa ser exatamente o ETag; W/"..." e '*' não correspondem.
+            Sem ela (If-None-Match), aceita lista, '*' e validadores fracos
+        
+    Returns:
+        True se o header corresponde ao ETag
+    """
+    if not cabecalho:
+        return False
+    if forte:
+        return cabecalho.strip() == etag
+    candidatos = [c.strip() for c in cabecalho.split(",")]
+    return "*" in candidatos or etag in candidatos or f"W/{etag}" in candidatos
+
+
+def interpretar_range(cabecalho: str, tamanho: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta um cabeçalho Range de intervalo único.
+    
+    Segue a RFC 9110: um Range com sintaxe inválida (ou outra unidade) é
+    ignorado e o arquivo vai inteiro; 416 só para intervalos válidos que
+    não cabem no arquivo.
+    
+    Args:
+        cabecalho: Valor do Range, ex: "bytes=0-1023", "bytes=1024-", "bytes=-500"
+        tamanho: Tamanho do arquivo em bytes
+        
+    Returns:
+        Tupla (inicio, fim) inclusiva ou None se o cabeçalho for inválido
+        (deve ser ignorado)
+        
+    Raises:
+        IntervaloInsatisfazivelError: Início além do fim do arquivo, sufixo
+            zero ou arquivo vazio
+    """
+    unidade, _, intervalo = cabecalho.partition("=")
+    correspondencia = PADRAO_INTERVALO.match(intervalo.strip())
+    if unidade.strip().lower() != "bytes" or correspondencia is None:
+        return None
+    inicio_txt, fim_txt = correspondencia.groups()
+    
+    if inicio_txt == "":
+        if fim_txt == "":
+            return None
+        # Sufixo: últimos N bytes
+        sufixo = int(fim_txt)
+        if sufixo == 0 or tamanho == 0:
+            raise IntervaloInsatisfazivelError(cabecalho)
+        return max(tamanho - sufixo, 0), tamanho - 1
+    
+    inicio = int(inicio_txt)
+    fim = int(fim_txt) if fim_txt else tamanho - 1
+    if fim_txt and fim < inicio:
+        return None
+    if inicio >= tamanho:
+        raise IntervaloInsatisfazivelError(cabecalho)
+    return inicio, min(fim, tamanho - 1)
+
+
+class ArquivoParcialResponse(Response):
+    """
+    Resposta 206 com um intervalo do arquivo.
+    
+    Usa a extensão ASGI `http.response.zerocopysend` (sendfile) quando o
+    servidor a oferece; caso contrário envia o intervalo em blocos.
+    """
+    
+    chunk_size = 64 * 1024
+    
+    def __init__(self, path: str, inicio: int, fim: int, tamanho: int, headers: dict, media_type: str):
+        self.path = path
+        self.inicio = inicio
+        self.fim = fim
+        self.status_code = 206
+        self.media_type = media_type
+        self.background = None
+        self.init_headers({
+            **headers,
+            "content-range": f"bytes {inicio}-{fim}/{tamanho}",
+            "content-length": str(fim - inicio + 1),
+        })
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        
+        restante = self.fim - self.inicio + 1
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": self.inicio,
+                    "count": restante,
+                    "more_body": False,
+                })
+            return
+        
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(self.inicio)
+            while restante > 0:
+                bloco = await f.read(min(self.chunk_size, restante))
+                if not bloco:
+                    break
+                restante -= len(bloco)
+                await send({
+                    "type": "http.response.body",
+                    "body": bloco,
+                    "more_body": restante > 0,
+                })
+        if restante > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def responder_download(
+    caminho: str,
+    filename: str,
+    cache_etag: CacheEtag,
+    if_none_match: Optional[str] = None,
+    range_header: Optional[str] = None,
+    if_range: Optional[str] = None,
+    media_type: str = "application/pdf"
+) -> Response:
+    """
+    Monta a resposta de download com validadores e suporte a Range.
+    
+    Args:
+        caminho: Caminho do arquivo no disco
+        filename: Nome exposto no Content-Disposition
+        cache_etag: Cache de hashes dos arquivos
+        if_none_match: Cabeçalho If-None-Match da requisição
+        range_header: Cabeçalho Range da requisição
+        if_range: Cabeçalho If-Range da requisição
+        media_type: Content-Type da resposta
+        
+    Returns:
+        Resposta 200 (arquivo inteiro ou Range inválido), 206 (intervalo),
+        304 (não modificado) ou 416 (intervalo fora do arquivo)
+    """
+    stat_result = os.stat(caminho)
+    digest = cache_etag.obter(caminho, stat_result)
+    etag = f'"{digest}"'
+    
+    # Só é imutável se o hash do nome bater com o conteúdo
+    nome_enderecado = PADRAO_NOME_ENDERECADO.match(filename)
+    imutavel = bool(nome_enderecado) and digest.startswith(nome_enderecado.group(1))
+    
+    headers = {
+        "etag": etag,
+        "cache-control": CACHE_IMUTAVEL if imutavel else CACHE_REVALIDAR,
+        "accept-ranges": "bytes",
+    }
+    
+    if etag_corresponde(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    tamanho = stat_result.st_size
+    # Múltiplos intervalos (multipart/byteranges) não são suportados: serve o arquivo inteiro
+    atende_range = (
+        range_header
+        and "," not in range_header
+        and (if_range is None or etag_corresponde(if_range, etag, forte=True))
+    )
+    intervalo = None
+    if atende_range:
+        try:
+            intervalo = interpretar_range(range_header, tamanho)
+        except IntervaloInsatisfazivelError:
+            return Response(
+                status_code=416,
+                headers={**headers, "content-range": f"bytes */{tamanho}"}
+            )
+    if intervalo is not None:
+        inicio, fim = intervalo
+        return ArquivoParcialResponse(
+            caminho, inicio, fim, tamanho,
+            headers={**headers, "content-disposition": _content_disposition(filename)},
+            media_type=media_type
+        )
+    
+    return FileResponse(
+        path=caminho,
+        filename=filename,
+        media_type=media_type,
+        headers=headers,
+        stat_result=stat_result
+    )
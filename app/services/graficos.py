@@ -1,13 +1,17 @@
 import matplotlib
 matplotlib.use('Agg')  # Backend não-interativo
 
-import matplotlib.pyplot as plt
+# Figure direto (sem pyplot): cada gráfico tem seu próprio canvas e pode ser
+# renderizado em paralelo por threads diferentes sem estado global compartilhado
+from matplotlib.figure import Figure
 import numpy as np
-from typing import List
+import math
+from typing import List, Optional
 import os
 import uuid
 
 from app.models.proposta import ProducaoMensalModel, RetornoInvestimentoModel
+from app.services.memoria import tamanho_raster_mb
 from app.utils.formatters import formatar_moeda_br, formatar_numero_br
 
 class GraficoService:
@@ -21,12 +25,67 @@ class GraficoService:
     COR_FUNDO = '#FFFFFF'
     COR_VERMELHO = '#C0392B' 
     
+    DPI = 300
+    
+    def __init__(self, max_raster_mb: Optional[float] = None):
+        """
+        Args:
+            max_raster_mb: Limite do buffer RGBA de cada figura. Figuras que
+                passariam do limite a 300 dpi (ex: tabelas com muitas linhas)
+                são renderizadas com dpi reduzido. None = sem limite.
+        """
+        self.max_raster_mb = max_raster_mb
+    
+    def _dpi_para(self, largura_pol: float, altura_pol: float) -> int:
+        """Maior dpi (até 300) cujo buffer RGBA cabe em max_raster_mb"""
+        if not self.max_raster_mb:
+            return self.DPI
+        tamanho = tamanho_raster_mb(largura_pol, altura_pol, self.DPI)
+        if tamanho <= self.max_raster_mb:
+            return self.DPI
+        return max(int(self.DPI * math.sqrt(self.max_raster_mb / tamanho)), 72)
+    
     def gerar_grafico_producao(
         self,
         dados_producao: List[ProducaoMensalModel],
         quantidade_modulos: int,
         output_dir: str
     ) -> str:
+        # Configurar figura
+        dpi = self._dpi_para(10, 5)
+        fig = Figure(figsize=(10, 5), dpi=dpi)
+        ax = fig.subplots()
+        fig.patch.set_facecolor(self.COR_FUNDO)
+        
+        self.desenhar_producao(ax, dados_producao, quantidade_modulos)
+        
+        fig.tight_layout()
+        
+        # Salvar
+        filename = f"grafico_producao_{uuid.uuid4().hex[:8]}.png"
+        filepath = os.path.join(output_dir, filename)
+        fig.savefig(filepath, dpi=dpi, bbox_inches='tight', facecolor=self.COR_FUNDO)
+        
+        return filepath
+    
+    def desenhar_producao(
+        self,
+        ax,
+        dados_producao: List[ProducaoMensalModel],
+        quantidade_modulos: int,
+        escala_fonte: float = 1.0
+    ):
+        """
+        Desenha o gráfico de produção mensal num Axes existente.
+        
+        Usado pelo gráfico do PDF e pela prévia de página.
+        
+        Args:
+            ax: Axes do matplotlib
+            dados_producao: Produção mensal (12 meses + média)
+            quantidade_modulos: Quantidade de módulos (geração por placa)
+            escala_fonte: Fator aplicado aos tamanhos de fonte (figuras menores)
+        """
         # Preparar dados
         meses = []
         geracao_total = []
@@ -42,9 +101,6 @@ class GraficoService:
             val_placa = item.geracao_total / quantidade_modulos if quantidade_modulos > 0 else 0
             geracao_por_placa.append(val_placa)
         
-        # Configurar figura
-        fig, ax = plt.subplots(figsize=(10, 5), dpi=300)
-        fig.patch.set_facecolor(self.COR_FUNDO)
         ax.set_facecolor(self.COR_FUNDO)
         
         # Posições das barras
@@ -69,7 +125,7 @@ class GraficoService:
                            xytext=(0, 3),
                            textcoords="offset points",
                            ha='center', va='bottom',
-                           fontsize=7, fontweight='bold',
+                           fontsize=7 * escala_fonte, fontweight='bold',
                            color=color)
 
         add_labels(bars1, self.COR_AZUL_ESCURO)
@@ -77,32 +133,22 @@ class GraficoService:
         
         # Eixos
         ax.set_xticks(x)
-        ax.set_xticklabels(meses, fontsize=9, color=self.COR_AZUL_ESCURO, fontweight='bold')
+        ax.set_xticklabels(meses, fontsize=9 * escala_fonte, color=self.COR_AZUL_ESCURO, fontweight='bold')
         ax.set_yticks([])
         ax.tick_params(axis='x', length=0)
         
         for spine in ax.spines.values():
             spine.set_visible(False)
             
-        ax.axhline(y=0, color=self.COR_AZUL_ESCURO, linewidth=2)
+        ax.axhline(y=0, color=self.COR_AZUL_ESCURO, linewidth=2 * escala_fonte)
         
         # Legenda no fundo
         ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.1), 
-                 ncol=2, frameon=False, fontsize=9)
+                 ncol=2, frameon=False, fontsize=9 * escala_fonte)
         
         # Título
-        ax.set_title('PRODUÇÃO MENSAL (kWh)', fontsize=11, fontweight='bold', 
-                    color=self.COR_AZUL_ESCURO, pad=20)
-        
-        plt.tight_layout()
-        
-        # Salvar
-        filename = f"grafico_producao_{uuid.uuid4().hex[:8]}.png"
-        filepath = os.path.join(output_dir, filename)
-        plt.savefig(filepath, dpi=300, bbox_inches='tight', facecolor=self.COR_FUNDO)
-        plt.close(fig)
-        
-        return filepath
+        ax.set_title('PRODUÇÃO MENSAL (kWh)', fontsize=11 * escala_fonte, fontweight='bold', 
+                    color=self.COR_AZUL_ESCURO, pad=20 * escala_fonte)
     
     def gerar_tabela_retorno(
         self,
@@ -125,7 +171,9 @@ class GraficoService:
         
         # Aumentada a largura para 10 polegadas para caber as 4 colunas confortavelmente
         fig_height = len(dados_tabela) * 0.4 + 1.2
-        fig, ax = plt.subplots(figsize=(10, fig_height), dpi=300)
+        dpi = self._dpi_para(10, fig_height)
+        fig = Figure(figsize=(10, fig_height), dpi=dpi)
+        ax = fig.subplots()
         
         fig.patch.set_facecolor(self.COR_FUNDO)
         ax.axis('off')
@@ -171,7 +219,6 @@ class GraficoService:
 
         filename = f"tabela_retorno_{uuid.uuid4().hex[:8]}.png"
         filepath = os.path.join(output_dir, filename)
-        plt.savefig(filepath, dpi=300, bbox_inches='tight', pad_inches=0.05)
-        plt.close(fig)
+        fig.savefig(filepath, dpi=dpi, bbox_inches='tight', pad_inches=0.05)
         
         return filepath
@@ -0,0 +1,78 @@
+"""
+Imagens Pré-compiladas no ReportLab
+Adaptador que desenha XObjects de imagem já decodificados, sem reler o
+arquivo a cada documento
+
+Espelha o trecho de registro de imagens de Canvas.drawImage do ReportLab
+4.1.0 e usa APIs privadas do canvas (_doc, _setXObjects, _code,
+_formsinuse, _currentPageHasImages) e de pdfdoc (_digester, idToObject,
+_smask). Ao atualizar o ReportLab, compare com Canvas.drawImage e rode
+tests/test_imagens_pdf.py, que confere byte a byte com o drawImage.
+"""
+
+import copy
+import warnings
+
+import reportlab
+from reportlab.pdfbase.pdfdoc import PDFImageXObject, PDFObjectReference
+from reportlab.pdfgen.canvas import _digester
+
+# Versão do ReportLab cujo Canvas.drawImage este módulo reproduz
+VERSAO_REPORTLAB_ESPELHADA = "4.1.0"
+
+if reportlab.Version != VERSAO_REPORTLAB_ESPELHADA:
+    warnings.warn(
+        f"imagens_pdf espelha o ReportLab {VERSAO_REPORTLAB_ESPELHADA}, mas a versão instalada é "
+        f"{reportlab.Version}; rode tests/test_imagens_pdf.py",
+        RuntimeWarning
+    )
+
+
+def compilar_imagem(caminho: str, mask=None) -> PDFImageXObject:
+    """
+    Decodifica a imagem uma vez, com o mesmo nome que canvas.drawImage daria ao arquivo.
+    
+    Args:
+        caminho: Arquivo da imagem
+        mask: Máscara, como em drawImage (ex: 'auto' para o canal alfa)
+    
+    Returns:
+        XObject pronto para desenhar_imagem
+    """
+    nome = _digester(f'{caminho}{mask}'.encode('utf-8'))
+    return PDFImageXObject(nome, caminho, mask=mask)
+
+
+def desenhar_imagem(canvas, imagem: PDFImageXObject, x: float, y: float, width: float, height: float) -> None:
+    """
+    Equivalente a canvas.drawImage para um XObject já compilado.
+    
+    O XObject é registrado uma vez por documento a partir de uma cópia
+    (o ReportLab altera o objeto ao registrar a máscara de transparência),
+    então o mesmo XObject serve a qualquer número de documentos.
+    """
+    documento = canvas._doc
+    reg_name = documento.getXObjectName(imagem.name)
+    if reg_name not in documento.idToObject:
+        objeto = copy.copy(imagem)
+        canvas._setXObjects(objeto)
+        documento.Reference(objeto, reg_name)
+        documento.addForm(imagem.name, objeto)
+        smask = getattr(imagem, '_smask', None)
+        if smask is not None:
+            del objeto._smask
+            m_reg_name = documento.getXObjectName(smask.name)
+            if m_reg_name not in documento.idToObject:
+                smask = copy.copy(smask)
+                canvas._setXObjects(smask)
+                objeto.smask = documento.Reference(smask, m_reg_name)
+            else:
+                objeto.smask = PDFObjectReference(m_reg_name)
+    
+    canvas._currentPageHasImages = 1
+    canvas.saveState()
+    canvas.translate(x, y)
+    canvas.scale(width, height)
+    canvas._code.append(f"/{reg_name} Do")
+    canvas.restoreState()
+    canvas._formsinuse.append(imagem.name)
@@ -0,0 +1,266 @@
+"""
+Registro de Marcas
+Cores, imagens e textos de cada marca (parceiros que revendem o gerador),
+com os geradores de PDF já compilados mantidos em cache LRU
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional, Tuple
+
+# Papéis das cores usadas no PDF e na prévia
+CORES_PADRAO = {
+    "primaria": "#336777",      # cabeçalho, títulos e tabelas
+    "destaque": "#16A085",      # nome do cliente e economia em 25 anos
+    "detalhe": "#F39C12",       # linhas decorativas
+    "cinza": "#7F8C8D",         # rodapé
+    "cinza_claro": "#ECF0F1",   # linhas alternadas das tabelas
+    "texto": "#333333",         # corpo do texto
+}
+
+TEXTO_FUNCIONAMENTO = """O sistema fotovoltaico é composto principalmente por três componentes: painéis solares, inversor e medidor bidirecional. Os painéis captam a energia solar e a convertem em energia elétrica de corrente contínua (CC). Em seguida, o inversor transforma essa corrente contínua em corrente alternada (CA), que pode ser utilizada pelos equipamentos elétricos. O medidor bidirecional desempenha um papel essencial ao monitorar a energia produzida pelo sistema. Ele controla o fluxo de energia, permitindo o uso da eletricidade da concessionária quando necessário e acumulando créditos para a energia excedente gerada pelo sistema solar. Isso elimina a necessidade de baterias para armazenar a energia excedente, tornando o sistema mais econômico e eficiente."""
+
+GARANTIAS_PADRAO = (
+    "<b>Módulos Fotovoltaicos:</b>&nbsp;Garantia de desempenho linear de 25 anos e garantia contra defeitos de fabricação de 15 anos, fornecida pelo fabricante.",
+    "<b>Inversor:</b>&nbsp;Garantia de 10 anos contra defeitos de fabricação, conforme especificado pelo fabricante.",
+    "<b>Estrutura de Fixação:</b>&nbsp;Garantia contra corrosão e defeitos de fabricação, de acordo com as especificações do fabricante.",
+    "<b>Serviço de Instalação:</b>&nbsp;Garantia de 1 ano, cobrindo a qualidade e a execução técnica do serviço realizado."
+)
+
+TEXTO_PAGAMENTO = "Oferecemos diversas formas de pagamento para facilitar a aquisição do seu sistema fotovoltaico. Entre as opções disponíveis estão:"
+
+PAGAMENTOS_PADRAO = (
+    "<b>Pagamento à Vista:</b>&nbsp;Desconto especial para pagamentos realizados à vista.",
+    "<b>Financiamento Bancário:</b>&nbsp;Parcerias com instituições financeiras que permitem financiar o sistema em até 120 meses, com condições acessíveis e taxas competitivas.",
+    "<b>Pagamento Parcelado:</b>&nbsp;Possibilidade de parcelamento direto no cartão."
+)
+
+TEXTO_PAGAMENTO_FECHO = "Todas as opções são planejadas para proporcionar flexibilidade e viabilizar o investimento em energia solar de forma prática e acessível."
+
+# IDs aceitos (também são nomes de arquivo em DIR_MARCAS)
+PADRAO_ID_MARCA = re.compile(r"^[a-z0-9_-]{1,64}$")
+
+
+@dataclass
+class Marca:
+    """
+    Identidade visual e textos de uma marca.
+    
+    Os textos aceitam a marcação de Paragraph do ReportLab (<b>, &nbsp;...).
+    Sem texto_diferencial, a seção "DIFERENCIAL!" fica de fora.
+    """
+    id: str
+    nome_empresa: str
+    logo_path: str
+    background_capa: str
+    texto_quem_somos: str
+    cores: Dict[str, str] = field(default_factory=lambda: dict(CORES_PADRAO))
+    texto_cabecalho: str = "PROPOSTA TÉCNICA E COMERCIAL"
+    texto_funcionamento: str = TEXTO_FUNCIONAMENTO
+    garantias: Tuple[str, ...] = GARANTIAS_PADRAO
+    texto_pagamento: str = TEXTO_PAGAMENTO
+    pagamentos: Tuple[str, ...] = PAGAMENTOS_PADRAO
+    texto_pagamento_fecho: str = TEXTO_PAGAMENTO_FECHO
+    texto_diferencial: Optional[str] = None
+    
+    @classmethod
+    def de_dict(cls, marca_id: str, dados: Dict[str, Any]) -> "Marca":
+        """
+        Cria a marca a partir do JSON de configuração.
+        
+        Cores não informadas usam CORES_PADRAO; textos não informados usam
+        os textos padrão (exceto texto_quem_somos, obrigatório).
+        
+        Raises:
+            ValueError: Campo desconhecido, obrigatório ausente ou cor inválida
+        """
+        conhecidos = {f.name for f in fields(cls)} - {"id"}
+        desconhecidos = set(dados) - conhecidos
+        if desconhecidos:
+            raise ValueError(f"Marca '{marca_id}': campos desconhecidos {sorted(desconhecidos)}")
+        
+        cores = dict(CORES_PADRAO)
+        for papel, cor in dados.get("cores", {}).items():
+            if papel not in CORES_PADRAO or not re.fullmatch(r"#[0-9A-Fa-f]{6}", str(cor)):
+                raise ValueError(f"Marca '{marca_id}': cor inválida {papel}={cor}")
+            cores[papel] = cor
+        
+        valores = {chave: valor for chave, valor in dados.items() if chave != "cores"}
+        for chave in ("garantias", "pagamentos"):
+            if chave in valores:
+                valores[chave] = tuple(valores[chave])
+        try:
+            return cls(id=marca_id, cores=cores, **valores)
+        except TypeError as e:
+            raise ValueError(f"Marca '{marca_id}': {e}")
+
+
+MARCA_LEVEL5 = Marca(
+    id="level5",
+    nome_empresa="Level5 Engenharia Elétrica",
+    logo_path="app/assets/logo-level5.png",
+    background_capa="app/assets/background_capa_full.jpg",
+    texto_quem_somos="""Somos uma empresa especializada no segmento de engenharia elétrica, com foco no desenvolvimento de projetos elétricos e na instalação de sistemas fotovoltaicos. Desde 2019, temos trabalhado para oferecer soluções eficientes e sustentáveis, sempre com alto padrão de qualidade. Ao longo de nossa trajetória, já realizamos mais de 700 projetos fotovoltaicos, contribuindo para a geração de energia limpa e a redução de custos energéticos de nossos clientes. Nosso compromisso é entregar excelência em cada etapa do processo, desde o planejamento até a execução, garantindo resultados que superam expectativas.""",
+    texto_diferencial="""
+        Em parceria com a Yelum Seguradora, oferecemos seguro para seu sistema fotovoltaico (1% a 1,5% do valor total/ano).
+        <b>Cobertura completa para:</b>&nbsp;Danos acidentais, Vendavais, Granizo, Incêndios, Raios, Explosões e Roubo/Furto.
+        Essa parceria reforça nosso compromisso com sua segurança. Realizamos a simulação e contratação diretamente no fechamento do projeto.
+        """
+)
+
+
+class MarcaNaoEncontradaError(Exception):
+    """ID de marca sem definição no registro"""
+    
+    def __init__(self, marca_id: str):
+        super().__init__(f"Marca desconhecida: {marca_id}")
+        self.marca_id = marca_id
+
+
+class MarcaInvalidaError(Exception):
+    """Arquivo de configuração da marca ilegível, com JSON malformado ou campos inválidos"""
+    
+    def __init__(self, marca_id: str, motivo: str):
+        super().__init__(f"Marca '{marca_id}' com configuração inválida: {motivo}")
+        self.marca_id = marca_id
+        self.motivo = motivo
+
+
+class RegistroMarcas:
+    """
+    Marcas disponíveis e seus geradores de PDF compilados.
+    
+    A Level5 é embutida; as demais vêm de arquivos <id>.json em `diretorio`.
+    Cada gerador é compilado uma vez (estilos, cores e imagens da capa e do
+    logo já decodificadas) e fica num cache LRU de até `max_compilados`
+    marcas, de forma que as requisições só escolhem a marca pelo ID.
+    """
+    
+    def __init__(
+        self,
+        diretorio: str,
+        max_compilados: int,
+        marca_padrao: str = MARCA_LEVEL5.id,
+        deterministico: bool = False
+    ):
+        self.diretorio = diretorio
+        self.max_compilados = max_compilados
+        self.marca_padrao = marca_padrao
+        self.deterministico = deterministico
+        self._definicoes: Dict[str, Marca] = {MARCA_LEVEL5.id: MARCA_LEVEL5}
+        # Arquivos inválidos: id -> (mtime do arquivo, motivo); relidos só se o arquivo mudar
+        self._invalidas: Dict[str, Tuple[float, str]] = {}
+        self._compilados: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.compilacoes = 0
+    
+    def _caminho(self, marca_id: str) -> str:
+        return os.path.join(self.diretorio, f"{marca_id}.json")
+    
+    def definicao(self, marca_id: Optional[str] = None) -> Marca:
+        """
+        Definição da marca (o JSON é lido só na primeira vez).
+        
+        Args:
+            marca_id: ID da marca (None = marca padrão)
+        
+        Raises:
+            MarcaNaoEncontradaError: ID inválido ou sem arquivo de configuração
+            MarcaInvalidaError: Arquivo ilegível, JSON malformado ou campos inválidos
+        """
+        marca_id = marca_id or self.marca_padrao
+        with self._lock:
+            marca = self._definicoes.get(marca_id)
+        if marca is not None:
+            return marca
+        
+        caminho = self._caminho(marca_id)
+        if not PADRAO_ID_MARCA.match(marca_id) or not os.path.exists(caminho):
+            raise MarcaNaoEncontradaError(marca_id)
+        
+        try:
+            mtime = os.path.getmtime(caminho)
+        except OSError:
+            raise MarcaNaoEncontradaError(marca_id)
+        with self._lock:
+            invalida = self._invalidas.get(marca_id)
+        if invalida is not None and invalida[0] == mtime:
+            raise MarcaInvalidaError(marca_id, invalida[1])
+        
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+            if not isinstance(dados, dict):
+                raise ValueError("o JSON deve ser um objeto")
+            marca = Marca.de_dict(marca_id, dados)
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self._invalidas[marca_id] = (mtime, str(e))
+            raise MarcaInvalidaError(marca_id, str(e))
+        
+        with self._lock:
+            self._invalidas.pop(marca_id, None)
+            return self._definicoes.setdefault(marca_id, marca)
+    
+    def existe(self, marca_id: Optional[str] = None) -> bool:
+        """True se a marca existe e a configuração é válida"""
+        try:
+            self.definicao(marca_id)
+        except (MarcaNaoEncontradaError, MarcaInvalidaError):
+            return False
+        return True
+    
+    def ids(self) -> List[str]:
+        """IDs de todas as marcas disponíveis (arquivos inválidos ficam de fora)"""
+        ids = {MARCA_LEVEL5.id}
+        if os.path.isdir(self.diretorio):
+            ids.update(
+                nome[:-5] for nome in os.listdir(self.diretorio)
+                if nome.endswith(".json") and PADRAO_ID_MARCA.match(nome[:-5])
+            )
+        return sorted(marca_id for marca_id in ids if self.existe(marca_id))
+    
+    def invalidas(self) -> Dict[str, str]:
+        """Marcas cujo arquivo falhou ao carregar, com o motivo"""
+        with self._lock:
+            return {marca_id: motivo for marca_id, (_, motivo) in self._invalidas.items()}
+    
+    def gerador(self, marca_id: Optional[str] = None):
+        """
+        PDFGenerator compilado da marca, criado na primeira vez e mantido em
+        cache (LRU).
+        
+        Args:
+            marca_id: ID da marca (None = marca padrão)
+        
+        Returns:
+            PDFGenerator com estilos e imagens prontos
+        """
+        from app.services.pdf_generator import PDFGenerator
+        
+        marca = self.definicao(marca_id)
+        with self._lock:
+            gerador = self._compilados.get(marca.id)
+            if gerador is not None:
+                self._compilados.move_to_end(marca.id)
+                return gerador
+            
+            gerador = PDFGenerator(marca=marca, deterministico=self.deterministico)
+            gerador.preparar_assets()
+            self._compilados[marca.id] = gerador
+            self.compilacoes += 1
+            while len(self._compilados) > self.max_compilados:
+                self._compilados.popitem(last=False)
+            return gerador
+    
+    def estado(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "marcas_compiladas": list(self._compilados),
+                "marcas_invalidas": sorted(self._invalidas),
+                "compilacoes": self.compilacoes
+            }
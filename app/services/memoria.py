@@ -0,0 +1,93 @@
+"""
+Serviço de Memória
+Medição de RSS e pico de memória durante um render
+"""
+
+import os
+import resource
+import sys
+import threading
+from typing import Optional
+
+_PAGINA_BYTES = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_atual_mb() -> float:
+    """
+    Retorna o RSS atual do processo em MB.
+    
+    Lê /proc/self/statm (Linux). Em outros sistemas usa o pico do processo
+    reportado por getrusage, que é a melhor aproximação disponível.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            paginas_residentes = int(f.read().split()[1])
+        return paginas_residentes * _PAGINA_BYTES / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reporta em bytes, Linux em KB
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return maxrss / divisor
+
+
+def tamanho_raster_mb(largura_pol: float, altura_pol: float, dpi: float) -> float:
+    """
+    Estima o buffer RGBA de uma figura matplotlib.
+    
+    Args:
+        largura_pol: Largura da figura em polegadas
+        altura_pol: Altura da figura em polegadas
+        dpi: Resolução
+        
+    Returns:
+        Tamanho do buffer em MB (ex: 10x5 pol a 300 dpi ≈ 17 MB)
+    """
+    return (largura_pol * dpi) * (altura_pol * dpi) * 4 / (1024 * 1024)
+
+
+class MonitorMemoria:
+    """
+    Mede o pico de RSS enquanto um bloco executa.
+    
+    Uma thread amostra o RSS a cada `intervalo` segundos; o pico fica em
+    `pico_mb` e o crescimento em relação ao início em `acrescimo_pico_mb`.
+    Com `orcamento_mb` definido, `excedido` indica se o crescimento passou
+    do orçamento.
+    
+    Exemplo:
+        with MonitorMemoria(orcamento_mb=512) as monitor:
+            renderizar()
+        monitor.pico_mb
+    """
+    
+    def __init__(self, orcamento_mb: Optional[float] = None, intervalo: float = 0.01):
+        self.orcamento_mb = orcamento_mb
+        self.intervalo = intervalo
+        self.inicial_mb = 0.0
+        self.pico_mb = 0.0
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def acrescimo_pico_mb(self) -> float:
+        return max(self.pico_mb - self.inicial_mb, 0.0)
+    
+    @property
+    def excedido(self) -> bool:
+        return self.orcamento_mb is not None and self.acrescimo_pico_mb > self.orcamento_mb
+    
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico_mb = max(self.pico_mb, rss_atual_mb())
+    
+    def __enter__(self):
+        self.inicial_mb = self.pico_mb = rss_atual_mb()
+        self._thread = threading.Thread(target=self._amostrar, name="monitor-memoria", daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+        self.pico_mb = max(self.pico_mb, rss_atual_mb())
+        return False
@@ -0,0 +1,54 @@
+"""
+Serviço de Métricas
+Contadores e medições em memória expostos em /api/v1/metricas
+"""
+
+import threading
+from typing import Dict, Any
+
+
+class Metricas:
+    """
+    Registro simples de métricas do processo.
+    
+    - contadores: valores que só aumentam (ex: renders concluídos)
+    - medições: série de valores com último, máximo, soma e quantidade
+      (ex: pico de memória por render)
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores: Dict[str, float] = {}
+        self._medicoes: Dict[str, Dict[str, float]] = {}
+    
+    def incrementar(self, nome: str, valor: float = 1) -> None:
+        with self._lock:
+            self._contadores[nome] = self._contadores.get(nome, 0) + valor
+    
+    def registrar(self, nome: str, valor: float) -> None:
+        with self._lock:
+            medicao = self._medicoes.get(nome)
+            if medicao is None:
+                self._medicoes[nome] = {"ultimo": valor, "maximo": valor, "soma": valor, "quantidade": 1}
+                return
+            medicao["ultimo"] = valor
+            medicao["maximo"] = max(medicao["maximo"], valor)
+            medicao["soma"] += valor
+            medicao["quantidade"] += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Retorna uma cópia das métricas atuais.
+        
+        Returns:
+            Dict com "contadores" e "medicoes" (incluindo a média de cada medição)
+        """
+        with self._lock:
+            medicoes = {
+                nome: {**m, "media": round(m["soma"] / m["quantidade"], 3)}
+                for nome, m in self._medicoes.items()
+            }
+            return {"contadores": dict(self._contadores), "medicoes": medicoes}
+
+
+metricas = Metricas()
@@ -0,0 +1,217 @@
+"""
+Montagem Paralela do PDF
+Renderiza as seções da proposta (capa, empresa, investimento, custo x
+benefício, opções...) em processos separados e concatena os PDFs com pypdf
+"""
+
+import io
+import multiprocessing
+import multiprocessing.util
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import NameObject
+
+from app import config
+from app.services.marcas import RegistroMarcas
+
+# Páginas esperadas por seção, usadas para numerar antes de saber o resultado
+PAGINAS_ESTIMADAS = {"custo_beneficio": 2, "opcao": 2}
+
+_executor_secoes: Optional[ProcessPoolExecutor] = None
+_lock_executor = threading.Lock()
+
+# Registro de marcas de cada processo de seções (preenchido por _inicializar_processo_secao)
+_registro_marcas: Optional[RegistroMarcas] = None
+
+
+def _inicializar_processo_secao(deterministico: bool):
+    """
+    Compila o gerador da marca padrão no processo de seções.
+    
+    Ao contrário de inicializar_worker, não carrega o matplotlib: as seções
+    só usam o ReportLab (gráfico e tabela chegam prontos, como PNG).
+    """
+    global _registro_marcas
+    _registro_marcas = RegistroMarcas(
+        diretorio=config.DIR_MARCAS,
+        max_compilados=config.MAX_MARCAS_COMPILADAS,
+        marca_padrao=config.MARCA_PADRAO,
+        deterministico=deterministico
+    )
+    _registro_marcas.gerador()
+
+
+def _encerrar_executor_secoes():
+    global _executor_secoes
+    with _lock_executor:
+        executor, _executor_secoes = _executor_secoes, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _obter_executor_secoes(deterministico: bool) -> ProcessPoolExecutor:
+    """
+    Processos das seções (um pool por processo de render, criado sob demanda).
+    
+    O trabalho do ReportLab (compressão e codificação das imagens) segura o
+    GIL, por isso as seções rodam em processos e não em threads. Cada
+    worker de render tem até PROCESSOS_SECOES processos de seções, que são
+    encerrados junto com ele (reciclagem por jobs ou troca do pool).
+    """
+    global _executor_secoes
+    with _lock_executor:
+        if _executor_secoes is None:
+            _executor_secoes = ProcessPoolExecutor(
+                max_workers=config.PROCESSOS_SECOES,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_processo_secao,
+                initargs=(deterministico,),
+                max_tasks_per_child=config.MAX_JOBS_POR_WORKER or None
+            )
+            # Um processo filho do multiprocessing junta (join) os próprios
+            # filhos ao sair, antes do atexit; sem encerrar o pool aqui, o
+            # worker de render ficaria preso esperando os processos de seções.
+            # A prioridade precisa ser maior que a das filas (10), que fecham
+            # a thread de envio antes de os sinais de parada chegarem
+            multiprocessing.util.Finalize(None, _encerrar_executor_secoes, exitpriority=100)
+        return _executor_secoes
+
+
+def _renderizar_secao(
+    marca_id: str,
+    tipo: str,
+    dados: Dict[str, Any],
+    nome_cliente: str,
+    pagina_inicial: int
+) -> Tuple[bytes, int]:
+    """Renderiza uma seção no processo auxiliar e devolve (bytes, páginas)"""
+    return _registro_marcas.gerador(marca_id).gerar_secao(tipo, dados, nome_cliente, pagina_inicial)
+
+
+def _paginas_iniciais(paginas: List[int]) -> List[int]:
+    """Número da primeira página de cada seção, dadas as páginas de cada uma"""
+    iniciais, proxima = [], 1
+    for quantidade in paginas:
+        iniciais.append(proxima)
+        proxima += quantidade
+    return iniciais
+
+
+def _reaproveitar_imagens(pagina, imagens: Dict[str, Any]) -> None:
+    """
+    Aponta as imagens da página (do leitor) já copiadas para o writer.
+    
+    Cada seção embute seu próprio logo e fundo com o mesmo nome de recurso
+    (o nome vem do hash do caminho da imagem); sem isso, o PDF final teria
+    uma cópia do logo por seção.
+    """
+    recursos = pagina.get("/Resources")
+    xobjects = recursos.get("/XObject") if recursos is not None else None
+    if xobjects is None:
+        return
+    for nome in list(xobjects):
+        if nome in imagens:
+            xobjects[NameObject(nome)] = imagens[nome]
+
+
+def _registrar_imagens(pagina, imagens: Dict[str, Any]) -> None:
+    """Guarda as referências (no writer) das imagens de uma página copiada"""
+    recursos = pagina.get("/Resources")
+    xobjects = recursos.get("/XObject") if recursos is not None else None
+    if xobjects is None:
+        return
+    for nome in xobjects:
+        imagens.setdefault(nome, xobjects.raw_get(nome))
+
+
+def concatenar_secoes(
+    secoes: List[Tuple[bytes, str]],
+    metadados: Dict[str, str]
+) -> bytes:
+    """
+    Concatena os PDFs das seções, com um marcador por seção.
+    
+    Args:
+        secoes: Lista de (bytes do PDF, título do marcador), na ordem final
+        metadados: Entradas do dicionário /Info (/Title, /Author...)
+    
+    Returns:
+        Bytes do PDF final
+    """
+    writer = PdfWriter()
+    # Os leitores precisam viver até o fim: o pypdf associa os objetos já
+    # copiados ao id() de cada leitor
+    leitores = []
+    imagens: Dict[str, Any] = {}
+    
+    for conteudo, titulo in secoes:
+        leitor = PdfReader(io.BytesIO(conteudo))
+        leitores.append(leitor)
+        for pagina in leitor.pages:
+            _reaproveitar_imagens(pagina, imagens)
+        
+        inicio = len(writer.pages)
+        writer.append(leitor, outline_item=titulo)
+        for pagina in writer.pages[inicio:]:
+            _registrar_imagens(pagina, imagens)
+    
+    writer.add_metadata(metadados)
+    saida = io.BytesIO()
+    writer.write(saida)
+    return saida.getvalue()
+
+
+def gerar_proposta_paralela(
+    pdf_generator,
+    secoes: List[Tuple[str, Dict[str, Any]]],
+    nome_cliente: str,
+    output_path: str
+) -> None:
+    """
+    Gera a proposta renderizando cada seção em paralelo.
+    
+    Cada seção é numerada a partir de uma estimativa de páginas das
+    anteriores; se alguma seção sair com outra quantidade de páginas, as
+    seguintes são renderizadas de novo com o número certo (uma rodada
+    basta, já que as páginas de uma seção não dependem da numeração).
+    
+    Args:
+        pdf_generator: PDFGenerator compilado da marca
+        secoes: Lista de (tipo, dados), como em secoes_proposta_plana
+        nome_cliente: Nome do cliente
+        output_path: Caminho do PDF de saída
+    """
+    executor = _obter_executor_secoes(pdf_generator.deterministico)
+    marca_id = pdf_generator.marca.id
+    
+    def submeter(indice, inicial):
+        tipo, dados = secoes[indice]
+        return executor.submit(_renderizar_secao, marca_id, tipo, dados, nome_cliente, inicial)
+    
+    estimadas = _paginas_iniciais([PAGINAS_ESTIMADAS.get(tipo, 1) for tipo, _ in secoes])
+    futuros = [submeter(indice, inicial) for indice, inicial in enumerate(estimadas)]
+    resultados = [futuro.result() for futuro in futuros]
+    
+    iniciais = _paginas_iniciais([paginas for _, paginas in resultados])
+    refeitas = {
+        indice: submeter(indice, inicial)
+        for indice, (inicial, estimada) in enumerate(zip(iniciais, estimadas))
+        if inicial != estimada
+    }
+    for indice, futuro in refeitas.items():
+        resultados[indice] = futuro.result()
+    
+    conteudo = concatenar_secoes(
+        [(pdf, pdf_generator.titulo_secao(tipo, dados)) for (pdf, _), (tipo, dados) in zip(resultados, secoes)],
+        {
+            "/Title": f"Proposta - {nome_cliente}",
+            "/Author": pdf_generator.AUTOR,
+            "/Creator": pdf_generator.CRIADOR,
+            "/Subject": pdf_generator.ASSUNTO
+        }
+    )
+    with open(output_path, "wb") as f:
+        f.write(conteudo)
@@ -16,34 +16,82 @@ from reportlab.platypus import (
     NextPageTemplate
 )
 from reportlab.graphics.shapes import Drawing, Line
+import io
 import os
+from typing import Optional
 from PIL import Image as PILImage
 
 # Certifique-se de que este import existe no seu projeto ou ajuste conforme necessário
 from app.utils.formatters import formatar_moeda_br
+from app.services.marcas import MARCA_LEVEL5, Marca
+from app.services.imagens_pdf import compilar_imagem, desenhar_imagem
 
 class PDFGenerator:
     
-    # Paleta de Cores Level5
-    COR_AZUL_ESCURO = HexColor('#336777')
-    COR_TEAL = HexColor('#16A085')
-    COR_LARANJA = HexColor('#F39C12')
-    COR_CINZA = HexColor('#7F8C8D')
-    COR_CINZA_CLARO = HexColor('#ECF0F1')
+    # Metadados fixos do PDF (o autor é o nome da empresa da marca)
+    CRIADOR = 'API Gerador de Propostas Solar'
+    ASSUNTO = 'Proposta Técnica e Comercial'
     
-    def __init__(self):
+    def __init__(self, marca: Optional[Marca] = None, deterministico: bool = False):
+        """
+        Args:
+            marca: Cores, imagens e textos da proposta (padrão: Level5). Use
+                RegistroMarcas.gerador para reaproveitar instâncias compiladas
+            deterministico: Usa o modo invariante do ReportLab (data de criação
+                e ID do documento fixos), de forma que a mesma entrada gere
+                exatamente os mesmos bytes
+        """
+        self.marca = marca or MARCA_LEVEL5
+        self.deterministico = deterministico
+        self.AUTOR = self.marca.nome_empresa
+        
+        # Paleta da marca
+        self.COR_PRIMARIA = HexColor(self.marca.cores['primaria'])
+        self.COR_DESTAQUE = HexColor(self.marca.cores['destaque'])
+        self.COR_DETALHE = HexColor(self.marca.cores['detalhe'])
+        self.COR_CINZA = HexColor(self.marca.cores['cinza'])
+        self.COR_CINZA_CLARO = HexColor(self.marca.cores['cinza_claro'])
+        self.COR_TEXTO = HexColor(self.marca.cores['texto'])
+        
         self.styles = getSampleStyleSheet()
         self._criar_estilos_customizados()
         
         # CAMINHOS DAS IMAGENS
-        self.background_capa = 'app/assets/background_capa_full.jpg' 
-        self.logo_path = 'app/assets/logo-level5.png'
+        self.background_capa = self.marca.background_capa
+        self.logo_path = self.marca.logo_path
+        
+        # Preenchidos por preparar_assets (uma vez por instância)
+        self._assets_prontos = False
+        self._capa = None
+        self._logo = None
+        self._logo_aspect = None
+    
+    def preparar_assets(self):
+        """
+        Decodifica as imagens da capa e do logo uma única vez.
+        
+        As imagens viram XObjects prontos (PNG decodificado e comprimido, JPEG
+        lido), reaproveitados por todos os documentos desta instância em vez
+        de serem lidos do disco a cada proposta.
+        """
+        if self._assets_prontos:
+            return
+        
+        if os.path.exists(self.background_capa):
+            self._capa = compilar_imagem(self.background_capa)
+        if os.path.exists(self.logo_path):
+            try:
+                self._logo = compilar_imagem(self.logo_path, mask='auto')
+                self._logo_aspect = self._logo.width / float(self._logo.height)
+            except Exception:
+                self._logo = None
+        self._assets_prontos = True
     
     def _criar_estilos_customizados(self):
         self.styles.add(ParagraphStyle(
             name='LabelClienteCapa',
             fontSize=14,
-            textColor=self.COR_AZUL_ESCURO,
+            textColor=self.COR_PRIMARIA,
             alignment=TA_LEFT,
             fontName='Helvetica-Bold',
             spaceAfter=2
@@ -52,7 +100,7 @@ class PDFGenerator:
         self.styles.add(ParagraphStyle(
             name='NomeClienteCapa',
             fontSize=26,
-            textColor=self.COR_TEAL,
+            textColor=self.COR_DESTAQUE,
             alignment=TA_LEFT,
             fontName='Helvetica-Bold',
             leading=28
@@ -61,7 +109,7 @@ class PDFGenerator:
         self.styles.add(ParagraphStyle(
             name='SecaoTitulo',
             fontSize=16,
-            textColor=self.COR_AZUL_ESCURO,
+            textColor=self.COR_PRIMARIA,
             alignment=TA_LEFT,
             fontName='Helvetica-Bold',
             spaceBefore=15,
@@ -72,7 +120,7 @@ class PDFGenerator:
             name='Corpo',
             parent=self.styles['Normal'],
             fontSize=12,
-            textColor=HexColor('#333333'),
+            textColor=self.COR_TEXTO,
             alignment=TA_JUSTIFY,
             spaceBefore=3,
             spaceAfter=6,
@@ -88,14 +136,34 @@ class PDFGenerator:
             spaceBefore=3,
             spaceAfter=3
         ))
+        
+        # Economia em 25 anos, em destaque
+        self.styles.add(ParagraphStyle(
+            name='Highlight',
+            parent=self.styles['CorpoBullet'],
+            textColor=self.COR_DESTAQUE,
+            fontSize=14
+        ))
+        
+        # Células com textos longos (especificações) na tabela comparativa
+        self.styles.add(ParagraphStyle(
+            name='CelulaComparativo',
+            parent=self.styles['Corpo'],
+            fontSize=9,
+            leading=11,
+            alignment=TA_CENTER,
+            spaceBefore=0,
+            spaceAfter=0
+        ))
 
     def _draw_cover(self, canvas, doc):
         """Desenha APENAS a imagem de fundo da capa na página inteira"""
         canvas.saveState()
         page_width, page_height = A4
         
-        if os.path.exists(self.background_capa):
-            canvas.drawImage(self.background_capa, 0, 0, width=page_width, height=page_height)
+        self.preparar_assets()
+        if self._capa is not None:
+            desenhar_imagem(canvas, self._capa, 0, 0, page_width, page_height)
         
         canvas.restoreState()
 
@@ -108,25 +176,20 @@ class PDFGenerator:
         header_height = 3.0 * cm
         
         # Retângulo Azul
-        canvas.setFillColor(self.COR_AZUL_ESCURO)
+        canvas.setFillColor(self.COR_PRIMARIA)
         canvas.rect(0, page_height - header_height, page_width, header_height, fill=1, stroke=0)
         
         # Linha Laranja Decorativa
-        canvas.setFillColor(self.COR_LARANJA)
+        canvas.setFillColor(self.COR_DETALHE)
         canvas.rect(0, page_height - header_height, page_width, 0.1*cm, fill=1, stroke=0)
         
         # Logo (Superior Direito)
-        if os.path.exists(self.logo_path):
+        self.preparar_assets()
+        if self._logo is not None:
             max_width = 8.0 * cm
             max_height = 2.5 * cm 
             margin_right = 1.0 * cm
-            
-            try:
-                with PILImage.open(self.logo_path) as img:
-                    img_w, img_h = img.size
-                    aspect = img_w / float(img_h)
-            except:
-                aspect = 1
+            aspect = self._logo_aspect
             
             draw_height = max_height
             draw_width = draw_height * aspect
@@ -137,19 +200,19 @@ class PDFGenerator:
 
             y_pos = page_height - (header_height / 2) - (draw_height / 2)
             
-            canvas.drawImage(
-                self.logo_path, 
-                page_width - draw_width - margin_right, 
-                y_pos, 
-                width=draw_width, 
-                height=draw_height, 
-                mask='auto'
+            desenhar_imagem(
+                canvas,
+                self._logo,
+                page_width - draw_width - margin_right,
+                y_pos,
+                draw_width,
+                draw_height
             )
             
         # Texto do Cabeçalho (Esquerda)
         canvas.setFont("Helvetica-Bold", 12)
         canvas.setFillColor(white)
-        canvas.drawString(2 * cm, page_height - 1.8 * cm, "PROPOSTA TÉCNICA E COMERCIAL")
+        canvas.drawString(2 * cm, page_height - 1.8 * cm, self.marca.texto_cabecalho)
         
         # --- RODAPÉ ---
         canvas.setStrokeColor(self.COR_CINZA_CLARO)
@@ -157,8 +220,9 @@ class PDFGenerator:
         
         canvas.setFont("Helvetica", 9)
         canvas.setFillColor(self.COR_CINZA)
-        canvas.drawString(2*cm, 1*cm, "Level5 Engenharia Elétrica")
-        canvas.drawRightString(page_width - 2*cm, 1*cm, f"Página {doc.page}")
+        canvas.drawString(2*cm, 1*cm, self.marca.nome_empresa)
+        # Seções renderizadas à parte (montagem paralela) começam com deslocamento
+        canvas.drawRightString(page_width - 2*cm, 1*cm, f"Página {doc.page + doc.deslocamento_paginas}")
         
         canvas.restoreState()
 
@@ -172,19 +236,26 @@ class PDFGenerator:
         except Exception:
             return 10 * cm
 
-    def gerar_proposta_plana(self, nome_cliente, modulos_quantidade, especificacoes_modulo, 
-                           inversores_quantidade, especificacoes_inversores, investimento_kit, 
-                           investimento_mao_de_obra, investimento_total, grafico_producao_path, 
-                           tabela_retorno_path, ano_payback, valor_payback, economia_25_anos, output_path):
+    def _criar_documento(self, output_path, nome_cliente, template_inicial='Capa', pagina_inicial=1):
+        """
+        Cria o documento com os templates de capa e de conteúdo.
         
-        # Configuração do Documento
+        Args:
+            template_inicial: Template da primeira página ('Capa' ou 'Conteudo')
+            pagina_inicial: Número impresso no rodapé da primeira página
+        """
         doc = BaseDocTemplate(
             output_path,
             pagesize=A4,
             rightMargin=2*cm,
             leftMargin=2*cm,
             topMargin=3.5*cm, 
-            bottomMargin=2*cm
+            bottomMargin=2*cm,
+            title=f"Proposta - {nome_cliente}",
+            author=self.AUTOR,
+            creator=self.CRIADOR,
+            subject=self.ASSUNTO,
+            invariant=1 if self.deterministico else None
         )
         
         frame_normal = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal')
@@ -192,59 +263,225 @@ class PDFGenerator:
         template_capa = PageTemplate(id='Capa', frames=[frame_normal], onPage=self._draw_cover)
         template_conteudo = PageTemplate(id='Conteudo', frames=[frame_normal], onPage=self._draw_header_footer)
         
-        doc.addPageTemplates([template_capa, template_conteudo])
+        # O primeiro template da lista é o da primeira página
+        templates = [template_capa, template_conteudo]
+        if template_inicial == 'Conteudo':
+            templates.reverse()
+        doc.addPageTemplates(templates)
+        doc.deslocamento_paginas = pagina_inicial - 1
+        return doc
+    
+    # Títulos das seções (marcadores do PDF na montagem paralela)
+    TITULOS_SECOES = {
+        'capa': 'Capa',
+        'empresa': 'Apresentação',
+        'investimento': 'Investimento',
+        'comparativo': 'Comparativo das Opções',
+        'custo_beneficio': 'Custo x Benefício',
+    }
+
+    def gerar_proposta_plana(self, nome_cliente, modulos_quantidade, especificacoes_modulo, 
+                           inversores_quantidade, especificacoes_inversores, investimento_kit, 
+                           investimento_mao_de_obra, investimento_total, grafico_producao_path, 
+                           tabela_retorno_path, ano_payback, valor_payback, economia_25_anos, output_path):
+        
+        secoes = self.secoes_proposta_plana(
+            nome_cliente, modulos_quantidade, especificacoes_modulo,
+            inversores_quantidade, especificacoes_inversores, investimento_kit,
+            investimento_mao_de_obra, investimento_total, grafico_producao_path,
+            tabela_retorno_path, ano_payback, valor_payback, economia_25_anos
+        )
+        self.gerar_documento(secoes, nome_cliente, output_path)
+
+    def gerar_proposta_multipla(self, nome_cliente, opcoes, output_path):
+        """
+        Gera uma única proposta com várias opções de sistema para o mesmo cliente.
+        
+        Capa, apresentação, garantia, formas de pagamento e diferencial aparecem
+        uma única vez (as imagens da capa e do logo são embutidas uma só vez no
+        arquivo). Em seguida vem a tabela comparativa e uma página de custo x
+        benefício por opção.
+        
+        Args:
+            nome_cliente: Nome do cliente
+            opcoes: Lista de dicts com as chaves titulo, modulos_quantidade,
+                especificacoes_modulo, inversores_quantidade,
+                especificacoes_inversores, investimento_kit,
+                investimento_mao_de_obra, investimento_total,
+                grafico_producao_path, tabela_retorno_path, ano_payback,
+                valor_payback e economia_25_anos
+            output_path: Caminho do PDF de saída
+        """
+        self.gerar_documento(self.secoes_proposta_multipla(nome_cliente, opcoes), nome_cliente, output_path)
+    
+    def secoes_proposta_plana(self, nome_cliente, modulos_quantidade, especificacoes_modulo,
+                              inversores_quantidade, especificacoes_inversores, investimento_kit,
+                              investimento_mao_de_obra, investimento_total, grafico_producao_path,
+                              tabela_retorno_path, ano_payback, valor_payback, economia_25_anos):
+        """
+        Seções da proposta de um sistema, na ordem do documento.
         
+        Returns:
+            Lista de (tipo, dados); cada seção começa numa página nova
+        """
+        return [
+            ('capa', {'nome_cliente': nome_cliente}),
+            ('empresa', {'itens': (modulos_quantidade, especificacoes_modulo,
+                                   inversores_quantidade, especificacoes_inversores)}),
+            ('investimento', {
+                'investimento_kit': investimento_kit,
+                'investimento_mao_de_obra': investimento_mao_de_obra,
+                'investimento_total': investimento_total
+            }),
+            ('custo_beneficio', {
+                'grafico_producao_path': grafico_producao_path,
+                'tabela_retorno_path': tabela_retorno_path,
+                'ano_payback': ano_payback,
+                'valor_payback': valor_payback,
+                'economia_25_anos': economia_25_anos
+            }),
+        ]
+    
+    def secoes_proposta_multipla(self, nome_cliente, opcoes):
+        """Seções da proposta com várias opções (ver gerar_proposta_multipla)"""
+        return [
+            ('capa', {'nome_cliente': nome_cliente}),
+            ('empresa', {'itens': None}),
+            ('comparativo', {'opcoes': opcoes}),
+        ] + [('opcao', opcao) for opcao in opcoes]
+    
+    def titulo_secao(self, tipo, dados):
+        if tipo == 'opcao':
+            return dados['titulo']
+        return self.TITULOS_SECOES[tipo]
+    
+    def gerar_documento(self, secoes, nome_cliente, output, pagina_inicial=1):
+        """
+        Monta e grava um PDF com as seções dadas, cada uma a partir de uma
+        página nova.
+        
+        Args:
+            secoes: Lista de (tipo, dados), como em secoes_proposta_plana
+            nome_cliente: Nome do cliente (metadados)
+            output: Caminho ou arquivo binário de saída
+            pagina_inicial: Número da primeira página no rodapé
+        
+        Returns:
+            Quantidade de páginas geradas
+        """
+        template_inicial = 'Capa' if secoes[0][0] == 'capa' else 'Conteudo'
+        doc = self._criar_documento(output, nome_cliente, template_inicial, pagina_inicial)
         story = []
         
-        # --- PÁGINA 1: CAPA ---
+        for indice, (tipo, dados) in enumerate(secoes):
+            if indice:
+                if secoes[indice - 1][0] == 'capa':
+                    story.append(NextPageTemplate('Conteudo'))
+                story.append(PageBreak())
+            getattr(self, f'_secao_{tipo}')(story, dados)
+        
+        doc.build(story)
+        return doc.page
+    
+    def gerar_secao(self, tipo, dados, nome_cliente, pagina_inicial=1):
+        """
+        Renderiza uma seção isolada (montagem paralela).
+        
+        Returns:
+            Tupla (bytes do PDF, quantidade de páginas)
+        """
+        buffer = io.BytesIO()
+        paginas = self.gerar_documento([(tipo, dados)], nome_cliente, buffer, pagina_inicial)
+        return buffer.getvalue(), paginas
+    
+    def _secao_capa(self, story, dados):
         story.append(Spacer(1, 22*cm)) 
         story.append(Paragraph("CLIENTE:", self.styles['LabelClienteCapa']))
-        story.append(Paragraph(nome_cliente.upper(), self.styles['NomeClienteCapa']))
+        story.append(Paragraph(dados['nome_cliente'].upper(), self.styles['NomeClienteCapa']))
+    
+    def _secao_empresa(self, story, dados):
+        self._adicionar_apresentacao(story)
+        if dados['itens']:
+            self._adicionar_descricao_itens(story, *dados['itens'])
+        self._adicionar_garantia(story)
+
+    def _secao_investimento(self, story, dados):
+        story.append(Paragraph("INVESTIMENTO", self.styles['SecaoTitulo']))
+        story.append(self._criar_linha_divisoria())
+        story.append(self._criar_tabela_investimento(
+            dados['investimento_kit'], dados['investimento_mao_de_obra'], dados['investimento_total']
+        ))
         
-        story.append(NextPageTemplate('Conteudo'))
-        story.append(PageBreak())
+        story.append(Spacer(1, 0.5*cm))
+        
+        self._adicionar_pagamento_diferencial(story)
         
-        # --- PÁGINA 2 ---
+    def _secao_comparativo(self, story, dados):
+        story.append(Paragraph("COMPARATIVO DAS OPÇÕES", self.styles['SecaoTitulo']))
+        story.append(self._criar_linha_divisoria())
+        story.append(self._criar_tabela_comparativa(dados['opcoes']))
+            
+        story.append(Spacer(1, 0.5*cm))
+        
+        self._adicionar_pagamento_diferencial(story)
+    
+    def _secao_custo_beneficio(self, story, dados):
+        story.append(Paragraph("CUSTO X BENEFÍCIO", self.styles['SecaoTitulo']))
+        story.append(self._criar_linha_divisoria())
+        self._adicionar_custo_beneficio(
+            story, dados['grafico_producao_path'], dados['tabela_retorno_path'],
+            dados['ano_payback'], dados['valor_payback'], dados['economia_25_anos']
+        )
+    
+    def _secao_opcao(self, story, opcao):
+        story.append(Paragraph(f"{opcao['titulo'].upper()}: CUSTO X BENEFÍCIO", self.styles['SecaoTitulo']))
+        story.append(self._criar_linha_divisoria())
+        self._adicionar_descricao_itens(
+            story, opcao['modulos_quantidade'], opcao['especificacoes_modulo'],
+            opcao['inversores_quantidade'], opcao['especificacoes_inversores'],
+            titulo=False
+        )
+        story.append(Spacer(1, 0.2*cm))
+        story.append(self._criar_tabela_investimento(
+            opcao['investimento_kit'], opcao['investimento_mao_de_obra'], opcao['investimento_total']
+        ))
+        story.append(Spacer(1, 0.3*cm))
+        self._adicionar_custo_beneficio(
+            story, opcao['grafico_producao_path'], opcao['tabela_retorno_path'],
+            opcao['ano_payback'], opcao['valor_payback'], opcao['economia_25_anos']
+        )
+
+    def _adicionar_apresentacao(self, story):
         story.append(Paragraph("QUEM SOMOS?", self.styles['SecaoTitulo']))
         story.append(self._criar_linha_divisoria())
         
-        texto_quem_somos = """Somos uma empresa especializada no segmento de engenharia elétrica, com foco no desenvolvimento de projetos elétricos e na instalação de sistemas fotovoltaicos. Desde 2019, temos trabalhado para oferecer soluções eficientes e sustentáveis, sempre com alto padrão de qualidade. Ao longo de nossa trajetória, já realizamos mais de 700 projetos fotovoltaicos, contribuindo para a geração de energia limpa e a redução de custos energéticos de nossos clientes. Nosso compromisso é entregar excelência em cada etapa do processo, desde o planejamento até a execução, garantindo resultados que superam expectativas."""
-        story.append(Paragraph(texto_quem_somos, self.styles['Corpo']))
+        story.append(Paragraph(self.marca.texto_quem_somos, self.styles['Corpo']))
         
         story.append(Paragraph("FUNCIONAMENTO DO SISTEMA FOTOVOLTAICO", self.styles['SecaoTitulo']))
         story.append(self._criar_linha_divisoria())
         
-        texto_func = """O sistema fotovoltaico é composto principalmente por três componentes: painéis solares, inversor e medidor bidirecional. Os painéis captam a energia solar e a convertem em energia elétrica de corrente contínua (CC). Em seguida, o inversor transforma essa corrente contínua em corrente alternada (CA), que pode ser utilizada pelos equipamentos elétricos. O medidor bidirecional desempenha um papel essencial ao monitorar a energia produzida pelo sistema. Ele controla o fluxo de energia, permitindo o uso da eletricidade da concessionária quando necessário e acumulando créditos para a energia excedente gerada pelo sistema solar. Isso elimina a necessidade de baterias para armazenar a energia excedente, tornando o sistema mais econômico e eficiente."""
-        story.append(Paragraph(texto_func, self.styles['Corpo']))
+        story.append(Paragraph(self.marca.texto_funcionamento, self.styles['Corpo']))
 
-        story.append(Paragraph("DESCRIÇÃO DOS ITENS:", self.styles['SecaoTitulo']))
-        story.append(self._criar_linha_divisoria())
+    def _adicionar_descricao_itens(self, story, modulos_quantidade, especificacoes_modulo,
+                                   inversores_quantidade, especificacoes_inversores, titulo=True):
+        if titulo:
+            story.append(Paragraph("DESCRIÇÃO DOS ITENS:", self.styles['SecaoTitulo']))
+            story.append(self._criar_linha_divisoria())
         
         # CORREÇÃO AQUI: Uso de bulletText
         story.append(Paragraph(f"{modulos_quantidade} {especificacoes_modulo}", self.styles['CorpoBullet'], bulletText='•'))
         story.append(Paragraph(f"{inversores_quantidade} Inversor(es) {especificacoes_inversores}", self.styles['CorpoBullet'], bulletText='•'))
-        
+
+    def _adicionar_garantia(self, story):
         story.append(Paragraph("GARANTIA", self.styles['SecaoTitulo']))
         story.append(self._criar_linha_divisoria())
         story.append(Paragraph("A garantia do sistema fotovoltaico é composta por:", self.styles['Corpo']))
         
-        garantias = [
-            "<b>Módulos Fotovoltaicos:</b>&nbsp;Garantia de desempenho linear de 25 anos e garantia contra defeitos de fabricação de 15 anos, fornecida pelo fabricante.",
-            "<b>Inversor:</b>&nbsp;Garantia de 10 anos contra defeitos de fabricação, conforme especificado pelo fabricante.",
-            "<b>Estrutura de Fixação:</b>&nbsp;Garantia contra corrosão e defeitos de fabricação, de acordo com as especificações do fabricante.",
-            "<b>Serviço de Instalação:</b>&nbsp;Garantia de 1 ano, cobrindo a qualidade e a execução técnica do serviço realizado."
-        ]
-        
         # CORREÇÃO AQUI: Uso de bulletText
-        for g in garantias:
+        for g in self.marca.garantias:
             story.append(Paragraph(g, self.styles['CorpoBullet'], bulletText='•'))
 
-        story.append(PageBreak())
-        
-        # --- PÁGINA 3 ---
-        story.append(Paragraph("INVESTIMENTO", self.styles['SecaoTitulo']))
-        story.append(self._criar_linha_divisoria())
-        
+    def _criar_tabela_investimento(self, investimento_kit, investimento_mao_de_obra, investimento_total):
         dados_inv = [
             ['DESCRIÇÃO', 'VALOR'],
             ['Kit Fotovoltaico', formatar_moeda_br(investimento_kit)],
@@ -254,11 +491,11 @@ class PDFGenerator:
         
         t_inv = Table(dados_inv, colWidths=[11*cm, 5*cm])
         t_inv.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), self.COR_AZUL_ESCURO),
+            ('BACKGROUND', (0,0), (-1,0), self.COR_PRIMARIA),
             ('TEXTCOLOR', (0,0), (-1,0), white),
             ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
             ('ALIGN', (1,0), (-1,-1), 'RIGHT'),
-            ('BACKGROUND', (0,-1), (-1,-1), self.COR_AZUL_ESCURO),
+            ('BACKGROUND', (0,-1), (-1,-1), self.COR_PRIMARIA),
             ('TEXTCOLOR', (0,-1), (-1,-1), white),
             ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
             ('ROWBACKGROUNDS', (1,1), (-1,-2), [white, self.COR_CINZA_CLARO]),
@@ -266,45 +503,71 @@ class PDFGenerator:
             ('BOTTOMPADDING', (0,0), (-1,-1), 12),
             ('TOPPADDING', (0,0), (-1,-1), 12),
         ]))
-        story.append(t_inv)
+        return t_inv
+
+    def _criar_tabela_comparativa(self, opcoes):
+        """Tabela lado a lado com os números principais de cada opção"""
+        def linha(rotulo, chave, fmt):
+            return [rotulo] + [fmt(opcao[chave]) for opcao in opcoes]
+        
+        dados = [
+            [''] + [opcao['titulo'].upper() for opcao in opcoes],
+            linha('Módulos', 'modulos_quantidade', lambda v: f"{v}"),
+            linha('Especificação', 'especificacoes_modulo', lambda v: v),
+            linha('Inversores', 'inversores_quantidade', lambda v: f"{v}"),
+            linha('Especificação', 'especificacoes_inversores', lambda v: v),
+            linha('Kit Fotovoltaico', 'investimento_kit', formatar_moeda_br),
+            linha('Mão de Obra e Projetos', 'investimento_mao_de_obra', formatar_moeda_br),
+            linha('Payback', 'ano_payback', lambda v: f"{v}º ano" if v else '-'),
+            linha('Economia em 25 anos', 'economia_25_anos', formatar_moeda_br),
+            linha('INVESTIMENTO TOTAL', 'investimento_total', formatar_moeda_br),
+        ]
         
-        story.append(Spacer(1, 0.5*cm))
+        # Textos longos (especificações) quebram linha dentro da célula
+        for row in (2, 4):
+            dados[row] = [dados[row][0]] + [Paragraph(v, self.styles['CelulaComparativo']) for v in dados[row][1:]]
+        
+        largura_rotulo = 4.5*cm
+        largura_opcao = (16*cm - largura_rotulo) / len(opcoes)
         
+        tabela = Table(dados, colWidths=[largura_rotulo] + [largura_opcao] * len(opcoes))
+        tabela.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,0), self.COR_PRIMARIA),
+            ('TEXTCOLOR', (0,0), (-1,0), white),
+            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ('FONTNAME', (0,1), (0,-1), 'Helvetica-Bold'),
+            ('ALIGN', (1,0), (-1,-1), 'CENTER'),
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+            ('BACKGROUND', (0,-1), (-1,-1), self.COR_PRIMARIA),
+            ('TEXTCOLOR', (0,-1), (-1,-1), white),
+            ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
+            ('ROWBACKGROUNDS', (0,1), (-1,-2), [white, self.COR_CINZA_CLARO]),
+            ('FONTSIZE', (0,0), (-1,-1), 9),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+            ('TOPPADDING', (0,0), (-1,-1), 8),
+        ]))
+        return tabela
+
+    def _adicionar_pagamento_diferencial(self, story):
         story.append(Paragraph("FORMAS DE PAGAMENTO", self.styles['SecaoTitulo']))
         story.append(self._criar_linha_divisoria())
-        story.append(Paragraph("Oferecemos diversas formas de pagamento para facilitar a aquisição do seu sistema fotovoltaico. Entre as opções disponíveis estão:", self.styles['Corpo']))
-        
-        pagamentos = [
-            "<b>Pagamento à Vista:</b>&nbsp;Desconto especial para pagamentos realizados à vista.",
-            "<b>Financiamento Bancário:</b>&nbsp;Parcerias com instituições financeiras que permitem financiar o sistema em até 120 meses, com condições acessíveis e taxas competitivas.",
-            "<b>Pagamento Parcelado:</b>&nbsp;Possibilidade de parcelamento direto no cartão."
-        ]
+        story.append(Paragraph(self.marca.texto_pagamento, self.styles['Corpo']))
         
         # CORREÇÃO AQUI: Uso de bulletText
-        for p in pagamentos:
+        for p in self.marca.pagamentos:
             story.append(Paragraph(p, self.styles['CorpoBullet'], bulletText='•'))
         
-        story.append(Paragraph("Todas as opções são planejadas para proporcionar flexibilidade e viabilizar o investimento em energia solar de forma prática e acessível.", self.styles['Corpo']))
-
-        story.append(Spacer(1, 0.2*cm))
-
-        # --- SEÇÃO DIFERENCIAL (COMPACTADA) ---
-        story.append(Paragraph("DIFERENCIAL!", self.styles['SecaoTitulo']))
-        story.append(self._criar_linha_divisoria())
+        story.append(Paragraph(self.marca.texto_pagamento_fecho, self.styles['Corpo']))
         
-        texto_diferencial_compacto = """
-        Em parceria com a Yelum Seguradora, oferecemos seguro para seu sistema fotovoltaico (1% a 1,5% do valor total/ano). 
-        <b>Cobertura completa para:</b>&nbsp;Danos acidentais, Vendavais, Granizo, Incêndios, Raios, Explosões e Roubo/Furto.
-        Essa parceria reforça nosso compromisso com sua segurança. Realizamos a simulação e contratação diretamente no fechamento do projeto.
-        """
-        story.append(Paragraph(texto_diferencial_compacto, self.styles['Corpo']))
+        # --- SEÇÃO DIFERENCIAL (COMPACTADA) ---
+        if self.marca.texto_diferencial:
+            story.append(Spacer(1, 0.2*cm))
+            story.append(Paragraph("DIFERENCIAL!", self.styles['SecaoTitulo']))
+            story.append(self._criar_linha_divisoria())
+            story.append(Paragraph(self.marca.texto_diferencial, self.styles['Corpo']))
 
-        story.append(PageBreak())
-        
-        # --- PÁGINA 4 ---
-        story.append(Paragraph("CUSTO X BENEFÍCIO", self.styles['SecaoTitulo']))
-        story.append(self._criar_linha_divisoria())
-        
+    def _adicionar_custo_beneficio(self, story, grafico_producao_path, tabela_retorno_path,
+                                   ano_payback, valor_payback, economia_25_anos):
         story.append(Paragraph("O gráfico abaixo ilustra a produção estimada de energia mês a mês. Essa estimativa considera a variação de irradiância solar ao longo do ano, garantindo uma visão realista do desempenho do sistema em diferentes períodos.", self.styles['Corpo']))
         
         if os.path.exists(grafico_producao_path):
@@ -325,10 +588,7 @@ class PDFGenerator:
             
             # Item 2 (Highlight)
             texto_economia = f"<b>Retorno significativo em 25 anos:</b>&nbsp;Economia acumulada de <b>{formatar_moeda_br(economia_25_anos)}</b>"
-            
-            # Criamos o estilo e passamos bulletText explicitamente
-            estilo_highlight = ParagraphStyle('Highlight', parent=self.styles['CorpoBullet'], textColor=self.COR_TEAL, fontSize=14)
-            story.append(Paragraph(texto_economia, estilo_highlight, bulletText='•'))
+            story.append(Paragraph(texto_economia, self.styles['Highlight'], bulletText='•'))
         
         story.append(Spacer(1, 0.3*cm))
         story.append(Paragraph("Com essas premissas, o investimento no sistema fotovoltaico se mostra altamente vantajoso, garantindo economia no curto prazo e uma valorização significativa no longo prazo.", self.styles['Corpo']))
@@ -342,9 +602,7 @@ class PDFGenerator:
             img_tabela.hAlign = 'CENTER'
             story.append(img_tabela)
 
-        doc.build(story)
-
     def _criar_linha_divisoria(self):
         d = Drawing(400, 5)
-        d.add(Line(0, 0, 460, 0, strokeColor=self.COR_LARANJA, strokeWidth=2))
+        d.add(Line(0, 0, 460, 0, strokeColor=self.COR_DETALHE, strokeWidth=2))
         return d
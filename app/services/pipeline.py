@@ -0,0 +1,129 @@
+"""
+Pipeline de Renderização
+Executa as etapas de um render como um grafo de dependências: etapas
+independentes rodam em paralelo no executor
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class Estagio:
+    """
+    Uma etapa do render.
+    
+    `funcao` recebe um dict com os resultados das dependências
+    (nome da etapa -> resultado) e retorna o resultado desta etapa.
+    """
+    nome: str
+    funcao: Callable[[Dict[str, Any]], Any]
+    dependencias: Tuple[str, ...] = field(default_factory=tuple)
+
+
+class PipelineRender:
+    """
+    Grafo de etapas de um render.
+    
+    Exemplo:
+        pipeline = PipelineRender([
+            Estagio("grafico", lambda r: gerar_grafico()),
+            Estagio("tabela", lambda r: gerar_tabela()),
+            Estagio("pdf", lambda r: montar(r["grafico"], r["tabela"]), ("grafico", "tabela")),
+        ])
+        resultados, tempos = pipeline.executar(executor)
+    """
+    
+    def __init__(self, estagios: List[Estagio]):
+        self.estagios = {estagio.nome: estagio for estagio in estagios}
+        if len(self.estagios) != len(estagios):
+            raise ValueError("Nomes de etapas duplicados no pipeline")
+        for estagio in estagios:
+            faltando = set(estagio.dependencias) - set(self.estagios)
+            if faltando:
+                raise ValueError(f"Etapa '{estagio.nome}' depende de etapas inexistentes: {sorted(faltando)}")
+        self._verificar_ciclos()
+    
+    def _verificar_ciclos(self) -> None:
+        visitados, pilha = set(), set()
+        
+        def visitar(nome: str):
+            if nome in pilha:
+                raise ValueError(f"Ciclo de dependências envolvendo a etapa '{nome}'")
+            if nome in visitados:
+                return
+            pilha.add(nome)
+            for dependencia in self.estagios[nome].dependencias:
+                visitar(dependencia)
+            pilha.discard(nome)
+            visitados.add(nome)
+        
+        for nome in self.estagios:
+            visitar(nome)
+    
+    def executar(
+        self,
+        executor: Executor,
+        cancelamento: Optional[Any] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Executa o pipeline, submetendo cada etapa assim que suas dependências terminam.
+        
+        Args:
+            executor: Executor onde as etapas rodam
+            cancelamento: Objeto com `verificar()`, chamado antes de iniciar
+                novas etapas; a exceção que ele levantar interrompe o
+                pipeline como a de uma etapa
+            
+        Returns:
+            Tupla (resultados por etapa, tempo de cada etapa em ms)
+            
+        Raises:
+            Exception: A primeira exceção levantada por uma etapa (ou pelo
+                cancelamento). Etapas ainda não iniciadas são canceladas e
+                as que já estão rodando terminam antes da exceção ser
+                propagada
+        """
+        resultados: Dict[str, Any] = {}
+        tempos: Dict[str, float] = {}
+        pendentes = dict(self.estagios)
+        em_execucao: Dict[Future, str] = {}
+        
+        def cronometrar(estagio: Estagio, entradas: Dict[str, Any]):
+            inicio = time.perf_counter()
+            resultado = estagio.funcao(entradas)
+            return resultado, (time.perf_counter() - inicio) * 1000
+        
+        def interromper():
+            for restante in em_execucao:
+                restante.cancel()
+            wait(em_execucao)
+        
+        while pendentes or em_execucao:
+            prontos = [
+                estagio for estagio in pendentes.values()
+                if all(dependencia in resultados for dependencia in estagio.dependencias)
+            ]
+            if prontos and cancelamento is not None:
+                try:
+                    cancelamento.verificar()
+                except Exception:
+                    interromper()
+                    raise
+            for estagio in prontos:
+                del pendentes[estagio.nome]
+                entradas = {dependencia: resultados[dependencia] for dependencia in estagio.dependencias}
+                em_execucao[executor.submit(cronometrar, estagio, entradas)] = estagio.nome
+            
+            concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                nome = em_execucao.pop(futuro)
+                try:
+                    resultados[nome], tempos[nome] = futuro.result()
+                except Exception:
+                    interromper()
+                    raise
+        
+        return resultados, {nome: round(ms, 1) for nome, ms in tempos.items()}
@@ -0,0 +1,199 @@
+"""
+Serviço de Prévia
+Renderiza uma única página da proposta em baixa resolução (PNG/WebP) para a
+interface de cotação, sem montar o PDF
+"""
+
+import io
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from PIL import Image as PILImage
+
+from app.models.proposta import PreviewRequest
+from app.services.calculos import CalculoService
+from app.services.graficos import GraficoService
+from app.services.marcas import MARCA_LEVEL5, Marca
+from app.utils.formatters import formatar_moeda_br
+
+# Página A4 em polegadas e centímetros (para posicionar como no PDF)
+A4_POL = (8.27, 11.69)
+A4_CM = (21.0, 29.7)
+
+
+class CachePreview:
+    """Cache LRU das imagens de prévia, indexado pelo hash da entrada"""
+    
+    def __init__(self, max_itens: int):
+        self.max_itens = max_itens
+        self._itens: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def obter(self, chave: str) -> Optional[bytes]:
+        with self._lock:
+            imagem = self._itens.get(chave)
+            if imagem is not None:
+                self._itens.move_to_end(chave)
+            return imagem
+    
+    def guardar(self, chave: str, imagem: bytes) -> None:
+        with self._lock:
+            self._itens[chave] = imagem
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+
+class PreviewService:
+    """
+    Desenha as páginas 3 (investimento) e 4 (custo x benefício) direto no
+    matplotlib, numa figura do tamanho de uma A4, reproduzindo cabeçalho,
+    títulos e conteúdo dinâmico do PDF com as cores e o logo da marca.
+    Páginas estáticas, tabela de retorno em alta resolução e montagem do
+    PDF ficam de fora.
+    """
+    
+    def __init__(self):
+        self.grafico_service = GraficoService()
+        self.calculo_service = CalculoService()
+        self._logos = {}
+        self._lock_logo = threading.Lock()
+    
+    def _carregar_logo(self, logo_path: str):
+        """Logo reduzido em memória, carregado uma vez por arquivo"""
+        with self._lock_logo:
+            if logo_path not in self._logos:
+                try:
+                    with PILImage.open(logo_path) as img:
+                        img = img.convert('RGBA')
+                        img.thumbnail((400, 200))
+                        self._logos[logo_path] = np.asarray(img)
+                except OSError:
+                    self._logos[logo_path] = False
+            return self._logos[logo_path]
+    
+    def _y(self, cm_do_topo: float) -> float:
+        """Converte distância do topo (cm) em coordenada de figura"""
+        return 1 - cm_do_topo / A4_CM[1]
+    
+    def _x(self, cm_da_esquerda: float) -> float:
+        return cm_da_esquerda / A4_CM[0]
+    
+    def _desenhar_cabecalho(self, fig: Figure, marca: Marca):
+        altura = 3.0 / A4_CM[1]
+        fig.patches.append(Rectangle((0, 1 - altura), 1, altura, transform=fig.transFigure,
+                                     color=marca.cores['primaria'], zorder=0))
+        fig.patches.append(Rectangle((0, 1 - altura), 1, 0.1 / A4_CM[1], transform=fig.transFigure,
+                                     color=marca.cores['detalhe'], zorder=1))
+        fig.text(self._x(2), self._y(1.8), marca.texto_cabecalho,
+                 color='white', fontsize=12, fontweight='bold', va='baseline')
+        
+        logo = self._carregar_logo(marca.logo_path)
+        if logo is not False:
+            aspecto = logo.shape[1] / logo.shape[0]
+            altura_cm = min(2.5, 8.0 / aspecto)
+            largura_cm = altura_cm * aspecto
+            ax_logo = fig.add_axes([
+                self._x(A4_CM[0] - 1.0 - largura_cm),
+                self._y(1.5 + altura_cm / 2),
+                largura_cm / A4_CM[0],
+                altura_cm / A4_CM[1]
+            ])
+            # Acima do retângulo do cabeçalho (a figura desenha os eixos antes dos patches)
+            ax_logo.set_zorder(2)
+            ax_logo.imshow(logo)
+            ax_logo.axis('off')
+    
+    def _titulo(self, fig: Figure, marca: Marca, texto: str, cm_do_topo: float):
+        fig.text(self._x(2), self._y(cm_do_topo), texto, color=marca.cores['primaria'],
+                 fontsize=16, fontweight='bold', va='top')
+        fig.add_artist(Rectangle((self._x(2), self._y(cm_do_topo + 0.9)), self._x(16), 0.06 / A4_CM[1],
+                                 transform=fig.transFigure, color=marca.cores['detalhe']))
+    
+    def _tabela_investimento(self, fig: Figure, marca: Marca, request: PreviewRequest, investimento_total: float,
+                             cm_do_topo: float):
+        linhas = [
+            ('DESCRIÇÃO', 'VALOR'),
+            ('Kit Fotovoltaico', formatar_moeda_br(request.investimento_kit_fotovoltaico)),
+            ('Mão de Obra e Projetos', formatar_moeda_br(request.investimento_mao_de_obra)),
+            ('INVESTIMENTO TOTAL', formatar_moeda_br(investimento_total)),
+        ]
+        altura_linha = 1.1
+        for indice, (descricao, valor) in enumerate(linhas):
+            topo = cm_do_topo + indice * altura_linha
+            destaque = indice in (0, len(linhas) - 1)
+            cor_fundo = marca.cores['primaria'] if destaque else ('white' if indice % 2 else marca.cores['cinza_claro'])
+            cor_texto = 'white' if destaque else marca.cores['texto']
+            fig.add_artist(Rectangle((self._x(2), self._y(topo + altura_linha)), self._x(16), altura_linha / A4_CM[1],
+                                     transform=fig.transFigure, color=cor_fundo))
+            peso = 'bold' if destaque else 'normal'
+            meio = self._y(topo + altura_linha / 2)
+            fig.text(self._x(2.3), meio, descricao, color=cor_texto, fontsize=10, fontweight=peso, va='center')
+            fig.text(self._x(17.7), meio, valor, color=cor_texto, fontsize=10, fontweight=peso, va='center', ha='right')
+        return cm_do_topo + len(linhas) * altura_linha
+    
+    def _pagina_investimento(self, fig: Figure, marca: Marca, request: PreviewRequest, resumo: dict):
+        self._titulo(fig, marca, "INVESTIMENTO", 3.8)
+        fim = self._tabela_investimento(fig, marca, request, resumo["investimento_total"], 5.2)
+        self._titulo(fig, marca, "FORMAS DE PAGAMENTO", fim + 1.0)
+        for indice, item in enumerate(marca.pagamentos):
+            # Só o título de cada forma de pagamento (o trecho em negrito)
+            titulo = re.sub(r"<[^>]+>", "", item.split("</b>")[0]).rstrip(":")
+            fig.text(self._x(2.3), self._y(fim + 2.6 + indice * 0.8), f"•  {titulo}",
+                     color=marca.cores['texto'], fontsize=11, va='top')
+    
+    def _pagina_custo_beneficio(self, fig: Figure, marca: Marca, request: PreviewRequest, resumo: dict):
+        self._titulo(fig, marca, "CUSTO X BENEFÍCIO", 3.8)
+        
+        ax = fig.add_axes([self._x(2), self._y(13.8), self._x(16), 8.0 / A4_CM[1]])
+        # O eixo tem ~63% da largura do gráfico do PDF (16 cm x 10 pol)
+        producao = self.calculo_service.obter_producao_mensal(request.producao_mensal, request.serie_geracao)
+        self.grafico_service.desenhar_producao(ax, producao, request.modulos_quantidade, escala_fonte=0.7)
+        
+        self._titulo(fig, marca, "RETORNO DO INVESTIMENTO", 15.2)
+        topo = 16.8
+        if resumo["ano_payback"]:
+            fig.text(self._x(2.3), self._y(topo),
+                     f"•  Lucro a partir do {resumo['ano_payback']}º ano: {formatar_moeda_br(resumo['valor_payback'])}",
+                     color=marca.cores['texto'], fontsize=11, fontweight='bold', va='top')
+            fig.text(self._x(2.3), self._y(topo + 0.9),
+                     f"•  Economia acumulada em 25 anos: {formatar_moeda_br(resumo['economia_25_anos'])}",
+                     color=marca.cores['destaque'], fontsize=13, fontweight='bold', va='top')
+            topo += 2.2
+        self._tabela_investimento(fig, marca, request, resumo["investimento_total"], topo)
+    
+    def renderizar(self, request: PreviewRequest, marca: Optional[Marca] = None) -> bytes:
+        """
+        Renderiza a página pedida.
+        
+        Args:
+            request: Dados da proposta, página, formato e largura em pixels
+            marca: Cores, logo e textos (padrão: Level5)
+            
+        Returns:
+            Bytes da imagem (PNG ou WebP)
+        """
+        resumo = self.calculo_service.calcular_resumo_financeiro(
+            request.investimento_kit_fotovoltaico,
+            request.investimento_mao_de_obra,
+            request.retorno_investimento
+        )
+        
+        marca = marca or MARCA_LEVEL5
+        fig = Figure(figsize=A4_POL, dpi=request.largura / A4_POL[0])
+        fig.patch.set_facecolor('white')
+        self._desenhar_cabecalho(fig, marca)
+        
+        if request.pagina == 3:
+            self._pagina_investimento(fig, marca, request, resumo)
+        else:
+            self._pagina_custo_beneficio(fig, marca, request, resumo)
+        
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=request.formato, facecolor='white')
+        return buffer.getvalue()
@@ -0,0 +1,286 @@
+"""
+Serviço de Renderização
+Monta a proposta completa (gráficos + PDF) a partir do request validado
+"""
+
+import base64
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app import config
+from app.models.proposta import PropostaRequest, PropostaMultiplaRequest, PropostaResponse
+from app.services.graficos import GraficoService
+from app.services.calculos import CalculoService
+from app.services.cancelamento import SinalCancelamento
+from app.services.downloads import hash_conteudo
+from app.services.marcas import RegistroMarcas
+from app.services.montagem import gerar_proposta_paralela
+from app.services.pipeline import Estagio, PipelineRender
+
+
+def _publicar_pdf(pdf_path: str, nome_cliente: str, output_dir: str):
+    """
+    Renomeia o PDF recém-gerado para um nome endereçado por conteúdo.
+    
+    O nome final leva os 16 primeiros dígitos do SHA-256 dos bytes, o que
+    permite servir o download com Cache-Control imutável.
+    
+    Returns:
+        Tupla (nome_arquivo, conteudo)
+    """
+    with open(pdf_path, "rb") as f:
+        conteudo = f.read()
+    
+    nome_arquivo = f"proposta_{nome_cliente.lower().replace(' ', '_')}_{hash_conteudo(conteudo)[:16]}.pdf"
+    os.replace(pdf_path, os.path.join(output_dir, nome_arquivo))
+    return nome_arquivo, conteudo
+
+
+_executor_estagios: Optional[ThreadPoolExecutor] = None
+_lock_executor = threading.Lock()
+
+
+def _obter_executor_estagios() -> ThreadPoolExecutor:
+    """Executor das etapas de um render (um por processo, criado sob demanda)"""
+    global _executor_estagios
+    with _lock_executor:
+        if _executor_estagios is None:
+            _executor_estagios = ThreadPoolExecutor(
+                max_workers=config.MAX_THREADS_ESTAGIOS,
+                thread_name_prefix="estagio"
+            )
+        return _executor_estagios
+
+
+_registro_marcas: Optional[RegistroMarcas] = None
+
+
+def _obter_registro_marcas() -> RegistroMarcas:
+    """Registro de marcas padrão do processo (quando o chamador não passa um)"""
+    global _registro_marcas
+    with _lock_executor:
+        if _registro_marcas is None:
+            _registro_marcas = RegistroMarcas(
+                diretorio=config.DIR_MARCAS,
+                max_compilados=config.MAX_MARCAS_COMPILADAS,
+                marca_padrao=config.MARCA_PADRAO,
+                deterministico=config.RENDER_DETERMINISTICO
+            )
+        return _registro_marcas
+
+
+def _codificar_pdf(pdf_path: str, nome_cliente: str, output_dir: str, incluir_base64: bool = True):
+    """Publica o PDF com nome endereçado por conteúdo e devolve (nome, base64 ou None)"""
+    nome_arquivo, conteudo = _publicar_pdf(pdf_path, nome_cliente, output_dir)
+    if not incluir_base64:
+        return nome_arquivo, None
+    return nome_arquivo, base64.b64encode(conteudo).decode("utf-8")
+
+
+def _gerar_pdf(pdf_generator, secoes, nome_cliente: str, pdf_path: str):
+    """Monta o PDF em sequência ou, com MONTAGEM_PARALELA, seção por seção em processos"""
+    if config.MONTAGEM_PARALELA:
+        gerar_proposta_paralela(pdf_generator, secoes, nome_cliente, pdf_path)
+    else:
+        pdf_generator.gerar_documento(secoes, nome_cliente, pdf_path)
+
+
+def _executar_pipeline(estagios, arquivos_temporarios, cancelamento: Optional[SinalCancelamento] = None):
+    """Executa as etapas e remove os arquivos temporários, mesmo em caso de erro ou cancelamento"""
+    try:
+        return PipelineRender(estagios).executar(_obter_executor_estagios(), cancelamento)
+    finally:
+        for caminho in arquivos_temporarios:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+
+def renderizar_proposta(
+    request: PropostaRequest,
+    output_dir: str,
+    grafico_service: Optional[GraficoService] = None,
+    registro_marcas: Optional[RegistroMarcas] = None,
+    incluir_base64: bool = True,
+    cancelamento: Optional[SinalCancelamento] = None
+) -> PropostaResponse:
+    """
+    Gera a proposta de um sistema: gráfico, tabela de retorno e PDF.
+    
+    Etapas: calculos, grafico, tabela e assets rodam em paralelo; pdf
+    depende de todas elas; codificacao depende do pdf.
+    
+    Args:
+        request: Dados da proposta
+        output_dir: Diretório onde o PDF é gravado
+        grafico_service: Instância já aquecida (padrão: cria uma nova)
+        registro_marcas: Registro com os geradores compilados de cada marca
+            (padrão: registro do processo)
+        incluir_base64: False para só gravar o arquivo (geração em lote)
+        cancelamento: Sinal verificado antes de cada etapa; quando o
+            servidor desiste do render, ele é abandonado com
+            RenderCanceladoError
+        
+    Returns:
+        PropostaResponse com o PDF em base64, os dados calculados e o tempo
+        de cada etapa
+    """
+    grafico_service = grafico_service or GraficoService()
+    pdf_generator = (registro_marcas or _obter_registro_marcas()).gerador(request.marca)
+    calculo_service = CalculoService()
+    
+    pdf_path = os.path.join(output_dir, f"render_{uuid.uuid4().hex}.pdf.tmp")
+    arquivos_temporarios = [pdf_path]
+    
+    def temporario(caminho):
+        arquivos_temporarios.append(caminho)
+        return caminho
+    
+    estagios = [
+        Estagio("calculos", lambda r: calculo_service.calcular_resumo_financeiro(
+            request.investimento_kit_fotovoltaico,
+            request.investimento_mao_de_obra,
+            request.retorno_investimento
+        )),
+        Estagio("grafico", lambda r: temporario(grafico_service.gerar_grafico_producao(
+            dados_producao=calculo_service.obter_producao_mensal(request.producao_mensal, request.serie_geracao),
+            quantidade_modulos=request.modulos_quantidade,
+            output_dir=output_dir
+        ))),
+        Estagio("tabela", lambda r: temporario(grafico_service.gerar_tabela_retorno(
+            dados_retorno=request.retorno_investimento,
+            output_dir=output_dir
+        ))),
+        Estagio("assets", lambda r: pdf_generator.preparar_assets()),
+        Estagio("pdf", lambda r: _gerar_pdf(pdf_generator, pdf_generator.secoes_proposta_plana(
+            nome_cliente=request.nome,
+            modulos_quantidade=request.modulos_quantidade,
+            especificacoes_modulo=request.especificacoes_modulo,
+            inversores_quantidade=request.inversores_quantidade,
+            especificacoes_inversores=request.especificacoes_inversores,
+            investimento_kit=request.investimento_kit_fotovoltaico,
+            investimento_mao_de_obra=request.investimento_mao_de_obra,
+            grafico_producao_path=r["grafico"],
+            tabela_retorno_path=r["tabela"],
+            **r["calculos"]
+        ), request.nome, pdf_path), ("calculos", "grafico", "tabela", "assets")),
+        Estagio("codificacao", lambda r: _codificar_pdf(pdf_path, request.nome, output_dir, incluir_base64), ("pdf",)),
+    ]
+    
+    resultados, tempos = _executar_pipeline(estagios, arquivos_temporarios, cancelamento)
+    nome_arquivo, pdf_base64 = resultados["codificacao"]
+    
+    return PropostaResponse(
+        success=True,
+        message="Proposta gerada com sucesso",
+        pdf_filename=nome_arquivo,
+        pdf_url=f"/api/v1/download/{nome_arquivo}",
+        pdf_base64=pdf_base64,
+        dados_calculados=resultados["calculos"],
+        tempos_estagios=tempos
+    )
+
+
+def renderizar_proposta_opcoes(
+    request: PropostaMultiplaRequest,
+    output_dir: str,
+    grafico_service: Optional[GraficoService] = None,
+    registro_marcas: Optional[RegistroMarcas] = None,
+    cancelamento: Optional[SinalCancelamento] = None
+) -> PropostaResponse:
+    """
+    Gera um único PDF com várias opções de sistema para o mesmo cliente.
+    
+    Gráfico e tabela de cada opção são etapas independentes
+    (grafico_1, tabela_1, grafico_2, ...) e rodam em paralelo.
+    
+    Args:
+        request: Dados do cliente e das opções
+        output_dir: Diretório onde o PDF é gravado
+        grafico_service: Instância já aquecida (padrão: cria uma nova)
+        registro_marcas: Registro com os geradores compilados de cada marca
+            (padrão: registro do processo)
+        cancelamento: Sinal verificado antes de cada etapa
+        
+    Returns:
+        PropostaResponse com o PDF em base64, os dados calculados de cada
+        opção e o tempo de cada etapa
+    """
+    grafico_service = grafico_service or GraficoService()
+    pdf_generator = (registro_marcas or _obter_registro_marcas()).gerador(request.marca)
+    calculo_service = CalculoService()
+    
+    pdf_path = os.path.join(output_dir, f"render_{uuid.uuid4().hex}.pdf.tmp")
+    arquivos_temporarios = [pdf_path]
+    
+    def temporario(caminho):
+        arquivos_temporarios.append(caminho)
+        return caminho
+    
+    def calcular_opcoes(r):
+        opcoes = []
+        for indice, opcao in enumerate(request.opcoes, start=1):
+            resumo = calculo_service.calcular_resumo_financeiro(
+                opcao.investimento_kit_fotovoltaico,
+                opcao.investimento_mao_de_obra,
+                opcao.retorno_investimento
+            )
+            opcoes.append({
+                "titulo": opcao.titulo or f"Opção {indice}",
+                "modulos_quantidade": opcao.modulos_quantidade,
+                "especificacoes_modulo": opcao.especificacoes_modulo,
+                "inversores_quantidade": opcao.inversores_quantidade,
+                "especificacoes_inversores": opcao.especificacoes_inversores,
+                "investimento_kit": opcao.investimento_kit_fotovoltaico,
+                "investimento_mao_de_obra": opcao.investimento_mao_de_obra,
+                **resumo
+            })
+        return opcoes
+    
+    def montar_pdf(r):
+        opcoes = r["calculos"]
+        for indice, dados_opcao in enumerate(opcoes, start=1):
+            dados_opcao["grafico_producao_path"] = r[f"grafico_{indice}"]
+            dados_opcao["tabela_retorno_path"] = r[f"tabela_{indice}"]
+        _gerar_pdf(pdf_generator, pdf_generator.secoes_proposta_multipla(request.nome, opcoes), request.nome, pdf_path)
+    
+    estagios = [Estagio("calculos", calcular_opcoes), Estagio("assets", lambda r: pdf_generator.preparar_assets())]
+    for indice, opcao in enumerate(request.opcoes, start=1):
+        # opcao=opcao fixa a opção de cada iteração no lambda
+        estagios.append(Estagio(f"grafico_{indice}", lambda r, opcao=opcao: temporario(grafico_service.gerar_grafico_producao(
+            dados_producao=calculo_service.obter_producao_mensal(opcao.producao_mensal, opcao.serie_geracao),
+            quantidade_modulos=opcao.modulos_quantidade,
+            output_dir=output_dir
+        ))))
+        estagios.append(Estagio(f"tabela_{indice}", lambda r, opcao=opcao: temporario(grafico_service.gerar_tabela_retorno(
+            dados_retorno=opcao.retorno_investimento,
+            output_dir=output_dir
+        ))))
+    estagios.append(Estagio("pdf", montar_pdf, tuple(estagio.nome for estagio in estagios)))
+    estagios.append(Estagio("codificacao", lambda r: _codificar_pdf(pdf_path, request.nome, output_dir), ("pdf",)))
+    
+    resultados, tempos = _executar_pipeline(estagios, arquivos_temporarios, cancelamento)
+    nome_arquivo, pdf_base64 = resultados["codificacao"]
+    
+    return PropostaResponse(
+        success=True,
+        message="Proposta gerada com sucesso",
+        pdf_filename=nome_arquivo,
+        pdf_url=f"/api/v1/download/{nome_arquivo}",
+        pdf_base64=pdf_base64,
+        dados_calculados={
+            "opcoes": [
+                {
+                    "titulo": dados_opcao["titulo"],
+                    "investimento_total": dados_opcao["investimento_total"],
+                    "ano_payback": dados_opcao["ano_payback"],
+                    "valor_payback": dados_opcao["valor_payback"],
+                    "economia_25_anos": dados_opcao["economia_25_anos"]
+                }
+                for dados_opcao in resultados["calculos"]
+            ]
+        },
+        tempos_estagios=tempos
+    )
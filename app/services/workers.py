@@ -0,0 +1,202 @@
+"""
+Pool de Workers de Renderização
+Processos dedicados aos renders, com medição de memória e reciclagem
+automática por quantidade de jobs ou crescimento de memória
+"""
+
+import gc
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.services.cancelamento import RenderCanceladoError
+from app.services.memoria import MonitorMemoria, rss_atual_mb
+from app.services.metricas import Metricas
+
+# Estado de cada processo worker (preenchido por inicializar_worker)
+_grafico_service = None
+_registro_marcas = None
+_rss_base_mb = 0.0
+
+
+def inicializar_worker(max_raster_mb: Optional[float], deterministico: bool):
+    """
+    Aquece matplotlib/ReportLab uma vez por processo e registra o RSS de base.
+    
+    O gerador da marca padrão já sai compilado; as demais marcas são
+    compiladas no primeiro uso e ficam no cache do registro.
+    """
+    global _grafico_service, _registro_marcas, _rss_base_mb
+    from matplotlib.figure import Figure
+    from app import config
+    from app.services.graficos import GraficoService
+    from app.services.marcas import RegistroMarcas
+    
+    _grafico_service = GraficoService(max_raster_mb=max_raster_mb)
+    _registro_marcas = RegistroMarcas(
+        diretorio=config.DIR_MARCAS,
+        max_compilados=config.MAX_MARCAS_COMPILADAS,
+        marca_padrao=config.MARCA_PADRAO,
+        deterministico=deterministico
+    )
+    _registro_marcas.gerador()
+    
+    # Carrega fontes e o backend Agg antes do primeiro job
+    fig = Figure(figsize=(1, 1))
+    fig.subplots().set_title("aquecimento")
+    fig.canvas.draw()
+    
+    gc.collect()
+    _rss_base_mb = rss_atual_mb()
+
+
+def servicos_do_worker():
+    """
+    Instâncias aquecidas deste processo worker.
+    
+    Returns:
+        Tupla (grafico_service, registro_marcas); (None, None) fora de um worker
+    """
+    return _grafico_service, _registro_marcas
+
+
+def _executar_no_worker(
+    funcao: Callable,
+    args: Tuple,
+    kwargs: Dict[str, Any],
+    orcamento_mb: Optional[float]
+) -> Tuple[Any, Dict[str, Any]]:
+    """Executa um render no worker e devolve (resultado, medições de memória)"""
+    with MonitorMemoria(orcamento_mb=orcamento_mb) as monitor:
+        resultado = funcao(*args, grafico_service=_grafico_service, registro_marcas=_registro_marcas, **kwargs)
+    
+    gc.collect()
+    rss_mb = rss_atual_mb()
+    return resultado, {
+        "pid": os.getpid(),
+        "pico_mb": round(monitor.pico_mb, 1),
+        "acrescimo_pico_mb": round(monitor.acrescimo_pico_mb, 1),
+        "orcamento_excedido": monitor.excedido,
+        "rss_worker_mb": round(rss_mb, 1),
+        "crescimento_worker_mb": round(rss_mb - _rss_base_mb, 1)
+    }
+
+
+class PoolRenderizacao:
+    """
+    ProcessPoolExecutor com reciclagem de workers.
+    
+    - Cada worker é substituído após `max_jobs_por_worker` renders
+      (max_tasks_per_child), o que descarta caches do matplotlib e do
+      ReportLab que crescem em processos de longa duração.
+    - Se um render reportar crescimento do worker acima de
+      `max_crescimento_mb`, ou pico acima de `orcamento_render_mb`, o pool
+      inteiro é trocado: novos jobs vão para processos novos e os antigos
+      terminam o que já estava em andamento.
+    
+    O executor é criado no primeiro submit.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int,
+        max_jobs_por_worker: int,
+        max_crescimento_mb: Optional[float],
+        orcamento_render_mb: Optional[float],
+        max_raster_mb: Optional[float],
+        deterministico: bool,
+        metricas: Metricas
+    ):
+        self.max_workers = max_workers
+        self.max_jobs_por_worker = max_jobs_por_worker
+        self.max_crescimento_mb = max_crescimento_mb
+        self.orcamento_render_mb = orcamento_render_mb
+        self.max_raster_mb = max_raster_mb
+        self.deterministico = deterministico
+        self.metricas = metricas
+        
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _novo_executor(self) -> ProcessPoolExecutor:
+        # max_tasks_per_child exige spawn/forkserver; spawn também evita herdar
+        # o estado de threads do servidor
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=inicializar_worker,
+            initargs=(self.max_raster_mb, self.deterministico),
+            max_tasks_per_child=self.max_jobs_por_worker or None
+        )
+    
+    def submit(self, funcao: Callable, *args, **kwargs) -> Future:
+        """
+        Agenda `funcao(*args, grafico_service=..., registro_marcas=..., **kwargs)` num worker.
+        
+        Returns:
+            Future com o resultado da função
+        """
+        try:
+            futuro_worker = self._submeter(funcao, args, kwargs)
+        except BrokenProcessPool:
+            # Um worker morreu (ex: OOM killer): troca o pool e tenta uma vez mais
+            self.reciclar()
+            futuro_worker = self._submeter(funcao, args, kwargs)
+        
+        futuro: Future = Future()
+        
+        def concluir(f: Future):
+            try:
+                resultado, medicoes = f.result()
+            except BaseException as e:
+                if isinstance(e, BrokenProcessPool):
+                    self.reciclar()
+                elif isinstance(e, RenderCanceladoError):
+                    self.metricas.incrementar("renders_interrompidos")
+                futuro.set_exception(e)
+                return
+            self._registrar(medicoes)
+            futuro.set_result(resultado)
+        
+        futuro_worker.add_done_callback(concluir)
+        return futuro
+    
+    def _submeter(self, funcao: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._novo_executor()
+            return self._executor.submit(_executar_no_worker, funcao, args, kwargs, self.orcamento_render_mb)
+    
+    def _registrar(self, medicoes: Dict[str, Any]) -> None:
+        self.metricas.incrementar("renders_concluidos")
+        self.metricas.registrar("render_pico_mb", medicoes["pico_mb"])
+        self.metricas.registrar("render_acrescimo_pico_mb", medicoes["acrescimo_pico_mb"])
+        self.metricas.registrar("worker_rss_mb", medicoes["rss_worker_mb"])
+        self.metricas.registrar("worker_crescimento_mb", medicoes["crescimento_worker_mb"])
+        
+        if medicoes["orcamento_excedido"]:
+            self.metricas.incrementar("renders_acima_orcamento")
+        
+        crescimento_excedido = (
+            self.max_crescimento_mb is not None
+            and medicoes["crescimento_worker_mb"] > self.max_crescimento_mb
+        )
+        if crescimento_excedido or medicoes["orcamento_excedido"]:
+            self.reciclar()
+    
+    def reciclar(self) -> None:
+        """Troca o executor; o antigo encerra depois de terminar os jobs em andamento"""
+        with self._lock:
+            antigo, self._executor = self._executor, None
+        if antigo is not None:
+            antigo.shutdown(wait=False)
+            self.metricas.incrementar("reciclagens_pool")
+    
+    def shutdown(self) -> None:
+        with self._lock:
+            antigo, self._executor = self._executor, None
+        if antigo is not None:
+            antigo.shutdown(wait=True)
@@ -0,0 +1,37 @@
+"""
+Coalescência de requisições: cancelamento pelo último interessado seguido
+de uma nova tentativa idêntica (ex: retry da automação após timeout)
+"""
+
+import asyncio
+
+from app.services.coalescencia import CoalescenciaRequisicoes
+
+
+def test_retry_apos_cancelamento_dispara_render_novo():
+    coalescencia = CoalescenciaRequisicoes(janela_segundos=60, max_concluidos=10)
+    renders = []
+    
+    async def render():
+        renders.append(len(renders))
+        try:
+            await asyncio.sleep(0.5)
+        except asyncio.CancelledError:
+            # Como o worker, só para depois de terminar a etapa atual
+            await asyncio.sleep(0.2)
+            raise
+        return f"pdf-{len(renders)}"
+    
+    async def cenario():
+        try:
+            await asyncio.wait_for(coalescencia.executar("chave", "impressao", render), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        # O primeiro render ainda está parando, mas não deve ser reaproveitado
+        return await coalescencia.executar("chave", "impressao", render)
+    
+    resultado, compartilhado = asyncio.run(cenario())
+    assert (resultado, compartilhado) == ("pdf-2", False)
+    assert len(renders) == 2
+    assert coalescencia.estado()["total_cancelados"] == 1
+    assert coalescencia.estado()["em_andamento"] == 0
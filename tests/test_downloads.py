@@ -0,0 +1,73 @@
+"""
+Validadores de download: Range de intervalo único (RFC 9110) e
+comparação de ETag para If-None-Match (fraca) e If-Range (forte)
+"""
+
+import pytest
+
+from app.services.downloads import IntervaloInsatisfazivelError, etag_corresponde, interpretar_range
+
+ETAG = '"abc123"'
+
+
+@pytest.mark.parametrize("cabecalho, esperado", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("BYTES = 0-0", (0, 0)),
+])
+def test_range_valido(cabecalho, esperado):
+    assert interpretar_range(cabecalho, 1000) == esperado
+
+
+@pytest.mark.parametrize("cabecalho", [
+    "bytes=5",
+    "bytes=abc",
+    "bytes=-",
+    "bytes=",
+    "bytes=10-5",
+    "bytes=+5-10",
+    "bytes=1_0-20",
+    "items=0-10",
+    "0-10",
+])
+def test_range_com_sintaxe_invalida_e_ignorado(cabecalho):
+    assert interpretar_range(cabecalho, 1000) is None
+
+
+@pytest.mark.parametrize("cabecalho, tamanho", [
+    ("bytes=1000-", 1000),
+    ("bytes=1000-2000", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+    ("bytes=0-", 0),
+])
+def test_range_insatisfazivel(cabecalho, tamanho):
+    with pytest.raises(IntervaloInsatisfazivelError):
+        interpretar_range(cabecalho, tamanho)
+
+
+@pytest.mark.parametrize("cabecalho, esperado", [
+    (None, False),
+    ("", False),
+    (ETAG, True),
+    (f"W/{ETAG}", True),
+    ('"outro", ' + ETAG, True),
+    ("*", True),
+    ('"outro"', False),
+])
+def test_etag_comparacao_fraca(cabecalho, esperado):
+    assert etag_corresponde(cabecalho, ETAG) is esperado
+
+
+@pytest.mark.parametrize("cabecalho, esperado", [
+    (ETAG, True),
+    (f" {ETAG} ", True),
+    (f"W/{ETAG}", False),
+    ("*", False),
+    ('"outro", ' + ETAG, False),
+])
+def test_etag_comparacao_forte(cabecalho, esperado):
+    assert etag_corresponde(cabecalho, ETAG, forte=True) is esperado
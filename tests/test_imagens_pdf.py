@@ -0,0 +1,74 @@
+"""
+Guarda do adaptador de imagens pré-compiladas (app/services/imagens_pdf.py)
+O adaptador usa APIs privadas do ReportLab; se uma atualização mudar o
+Canvas.drawImage, estes testes falham em vez de gerar PDFs corrompidos
+"""
+
+import io
+
+import pytest
+from PIL import Image as PILImage
+from reportlab.pdfgen.canvas import Canvas
+
+from app.services.imagens_pdf import compilar_imagem, desenhar_imagem
+
+
+@pytest.fixture
+def imagens(tmp_path):
+    """Um PNG com transparência (como o logo) e um JPEG (como a capa)"""
+    png = tmp_path / "logo.png"
+    imagem = PILImage.new("RGBA", (40, 20), (51, 103, 119, 255))
+    imagem.putpixel((0, 0), (0, 0, 0, 0))
+    imagem.save(png)
+    
+    jpeg = tmp_path / "capa.jpg"
+    PILImage.new("RGB", (60, 80), (22, 160, 133)).save(jpeg)
+    return str(png), str(jpeg)
+
+
+def _gerar_pdf(desenhar) -> bytes:
+    """Duas páginas, cada uma com o logo duas vezes e a capa uma vez"""
+    buffer = io.BytesIO()
+    canvas = Canvas(buffer, invariant=1)
+    for _ in range(2):
+        desenhar(canvas)
+        canvas.showPage()
+    canvas.save()
+    return buffer.getvalue()
+
+
+def _com_draw_image(png, jpeg):
+    def desenhar(canvas):
+        canvas.drawImage(jpeg, 0, 0, 595, 842)
+        canvas.drawImage(png, 50, 700, 80, 40, mask='auto')
+        canvas.drawImage(png, 400, 700, 80, 40, mask='auto')
+    return desenhar
+
+
+def _com_adaptador(logo, capa):
+    def desenhar(canvas):
+        desenhar_imagem(canvas, capa, 0, 0, 595, 842)
+        desenhar_imagem(canvas, logo, 50, 700, 80, 40)
+        desenhar_imagem(canvas, logo, 400, 700, 80, 40)
+    return desenhar
+
+
+def test_igual_ao_draw_image_byte_a_byte(imagens):
+    png, jpeg = imagens
+    esperado = _gerar_pdf(_com_draw_image(png, jpeg))
+    
+    logo, capa = compilar_imagem(png, mask='auto'), compilar_imagem(jpeg)
+    assert _gerar_pdf(_com_adaptador(logo, capa)) == esperado
+
+
+def test_xobject_reaproveitado_entre_documentos(imagens):
+    png, jpeg = imagens
+    logo, capa = compilar_imagem(png, mask='auto'), compilar_imagem(jpeg)
+    
+    primeiro = _gerar_pdf(_com_adaptador(logo, capa))
+    segundo = _gerar_pdf(_com_adaptador(logo, capa))
+    assert segundo == primeiro
+    
+    # Capa, logo e a máscara do logo: cada um embutido uma única vez
+    assert primeiro.count(b"/Subtype /Image") == 3
+    assert primeiro.count(b"/SMask") == 1
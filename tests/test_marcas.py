@@ -0,0 +1,38 @@
+"""
+Registro de marcas: arquivos de marca inválidos viram MarcaInvalidaError
+(em cache até o arquivo mudar) e ficam fora da lista de marcas
+"""
+
+import json
+import os
+
+import pytest
+
+from app.services.marcas import MarcaInvalidaError, MarcaNaoEncontradaError, RegistroMarcas
+
+
+def test_arquivo_invalido_fica_fora_e_erro_em_cache(tmp_path):
+    caminho = tmp_path / "quebrada.json"
+    caminho.write_text('{"nome_empresa": "Parceiro", "texto_q', encoding="utf-8")
+    registro = RegistroMarcas(diretorio=str(tmp_path), max_compilados=2)
+    
+    with pytest.raises(MarcaInvalidaError):
+        registro.definicao("quebrada")
+    assert registro.ids() == ["level5"]
+    assert "quebrada" in registro.invalidas()
+    assert not registro.existe("quebrada")
+    with pytest.raises(MarcaNaoEncontradaError):
+        registro.definicao("inexistente")
+    
+    # Corrigido o arquivo (mtime diferente), a marca passa a valer sem reiniciar
+    caminho.write_text(json.dumps({
+        "nome_empresa": "Parceiro",
+        "logo_path": "logo.png",
+        "background_capa": "capa.jpg",
+        "texto_quem_somos": "Texto"
+    }), encoding="utf-8")
+    mtime = os.path.getmtime(caminho) + 1
+    os.utime(caminho, (mtime, mtime))
+    assert registro.definicao("quebrada").nome_empresa == "Parceiro"
+    assert registro.ids() == ["level5", "quebrada"]
+    assert registro.invalidas() == {}
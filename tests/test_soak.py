@@ -0,0 +1,102 @@
+"""
+Teste de longa duração (soak) dos workers de render
+Renderiza milhares de propostas pelo PoolRenderizacao e verifica que o RSS
+dos workers não cresce depois do aquecimento: a média do RSS na segunda
+metade dos renders é comparada com a da primeira (o pico de cada render
+oscila com o alocador, a média não)
+
+Opcional (demora): SOAK_RENDERS=2000 python -m pytest tests/test_soak.py -q
+"""
+
+import os
+
+import pytest
+
+from app.models.proposta import PropostaRequest
+from app.services.metricas import Metricas
+from app.services.renderizacao import renderizar_proposta
+from app.services.workers import PoolRenderizacao
+
+TOTAL_RENDERS = int(os.getenv("SOAK_RENDERS", "0"))
+# Caches do matplotlib/ReportLab se estabilizam em ~30-50 renders por worker
+RENDERS_AQUECIMENTO = int(os.getenv("SOAK_AQUECIMENTO", "100"))
+# Crescimento tolerado na média do RSS dos workers entre as duas metades
+TOLERANCIA_MB = float(os.getenv("SOAK_TOLERANCIA_MB", "50"))
+PROCESSOS = 2
+# Renders pendentes no máximo (cada um guarda só o resultado, sem o PDF)
+MAX_EM_VOO = 8
+
+pytestmark = pytest.mark.skipif(
+    TOTAL_RENDERS <= 0,
+    reason="soak opcional: defina SOAK_RENDERS (ex: 2000)"
+)
+
+
+def _payload(indice: int) -> PropostaRequest:
+    """Proposta com dados variando a cada render (poucos nomes, para não encher o disco)"""
+    producao = [{"mes": mes, "geracao_total": 1300 + 20 * mes + indice % 50} for mes in range(1, 13)]
+    producao.append({"mes": "média", "geracao_total": 1430})
+    
+    saldo = -76028.29 - (indice % 100) * 10
+    retorno = []
+    for ano in range(1, 26):
+        retorno.append({"ano": ano, "saldo": round(saldo, 2), "economia_mensal": 1460.0, "economia_anual": 17520.0})
+        saldo += 17520.0
+    
+    return PropostaRequest(
+        nome=f"Cliente Soak {indice % 10}",
+        modulos_quantidade=40 + indice % 30,
+        especificacoes_modulo="620W Mono Honor Solar",
+        inversores_quantidade=2,
+        especificacoes_inversores="SOFAR 20kW AFCI",
+        investimento_kit_fotovoltaico=46028.29,
+        investimento_mao_de_obra=30000.0,
+        producao_mensal=producao,
+        retorno_investimento=retorno
+    )
+
+
+def _renderizar(pool: PoolRenderizacao, inicio: int, quantidade: int, output_dir: str) -> None:
+    em_voo = []
+    for indice in range(inicio, inicio + quantidade):
+        if len(em_voo) >= MAX_EM_VOO:
+            em_voo.pop(0).result()
+        em_voo.append(pool.submit(renderizar_proposta, _payload(indice), output_dir, incluir_base64=False))
+    for futuro in em_voo:
+        futuro.result()
+
+
+def test_rss_dos_workers_estavel(tmp_path):
+    metricas = Metricas()
+    # Sem reciclagem: o teste mede o crescimento de workers de longa duração
+    pool = PoolRenderizacao(
+        max_workers=PROCESSOS,
+        max_jobs_por_worker=0,
+        max_crescimento_mb=None,
+        orcamento_render_mb=None,
+        max_raster_mb=64,
+        deterministico=True,
+        metricas=metricas
+    )
+    metade = TOTAL_RENDERS // 2
+    metricas_metades = (Metricas(), Metricas())
+    try:
+        _renderizar(pool, 0, RENDERS_AQUECIMENTO, str(tmp_path))
+        inicio = RENDERS_AQUECIMENTO
+        for metricas_metade, quantidade in zip(metricas_metades, (metade, TOTAL_RENDERS - metade)):
+            pool.metricas = metricas_metade
+            _renderizar(pool, inicio, quantidade, str(tmp_path))
+            inicio += quantidade
+    finally:
+        pool.shutdown()
+    
+    primeira, segunda = (m.snapshot() for m in metricas_metades)
+    for snapshot in (primeira, segunda):
+        assert snapshot["contadores"].get("reciclagens_pool", 0) == 0
+    assert primeira["contadores"]["renders_concluidos"] + segunda["contadores"]["renders_concluidos"] == TOTAL_RENDERS
+    
+    rss_inicio = primeira["medicoes"]["worker_rss_mb"]["media"]
+    rss_fim = segunda["medicoes"]["worker_rss_mb"]["media"]
+    assert rss_fim - rss_inicio <= TOLERANCIA_MB, (
+        f"RSS médio dos workers cresceu de {rss_inicio} MB para {rss_fim} MB em {TOTAL_RENDERS} renders"
+    )